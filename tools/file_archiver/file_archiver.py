@@ -8,15 +8,106 @@ Supports deduplication, metadata extraction, and customizable organization rules
 import json
 import shutil
 import hashlib
+import mmap
+import sys
+import time
+from collections import defaultdict
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Set
+from typing import List, Dict, Set, Callable, Tuple, Union, Optional
 import logging
 from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import os
 
+try:
+    import xxhash
+except ImportError:
+    # xxhash is optional; BLAKE2b from the standard library is used instead
+    xxhash = None
+
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows; reflink copies are simply not attempted
+    fcntl = None
+
 logger = logging.getLogger(__name__)
 
+# Read buffer for hashing; hashlib releases the GIL for large update() calls
+HASH_BUFFER_SIZE = 1 << 20
+
+# Progress is logged every PROGRESS_LOG_FILES files or PROGRESS_LOG_INTERVAL
+# seconds, whichever comes first
+PROGRESS_LOG_FILES = 1000
+PROGRESS_LOG_INTERVAL = 1.0
+
+# Number of leading bytes hashed to cheaply rule out non-duplicates
+HEAD_HASH_SIZE = 64 * 1024
+
+# ioctl request that clones a file's extents (reflink) on btrfs/XFS
+FICLONE = 0x40049409
+
+# Files larger than this are memory-mapped and hashed in a single update()
+# call, leaving I/O to the page cache and avoiding the per-chunk loop
+MMAP_MIN_SIZE = 16 << 20
+
+# Default filesystems on Windows and macOS are case-insensitive, so names
+# differing only in case would collide in the target directory
+CASE_INSENSITIVE_NAMES = sys.platform in ('win32', 'darwin')
+
+def _name_key(name: str) -> str:
+    """Key under which a file name is compared with existing directory entries"""
+    return name.casefold() if CASE_INSENSITIVE_NAMES else name
+
+def _new_md5():
+    """Create an MD5 hasher flagged as non-security use, skipping FIPS checks"""
+    try:
+        return hashlib.new('md5', usedforsecurity=False)
+    except TypeError:
+        return hashlib.md5()
+
+def _new_blake2b():
+    """Create a 128-bit BLAKE2b hasher flagged as non-security use"""
+    try:
+        return hashlib.blake2b(digest_size=16, usedforsecurity=False)
+    except TypeError:
+        return hashlib.blake2b(digest_size=16)
+
+# Supported hash algorithms for duplicate detection and copy verification.
+# Collision resistance is not required here, so fast non-cryptographic
+# hashes are preferred over MD5.
+HASH_ALGORITHMS: Dict[str, Callable] = {
+    'blake2b': _new_blake2b,
+    'md5': _new_md5,
+}
+if xxhash is not None:
+    HASH_ALGORITHMS['xxh3'] = xxhash.xxh3_128
+
+DEFAULT_HASH_ALGORITHM = 'xxh3'
+DEFAULT_HASH_WORKERS = min(8, os.cpu_count() or 1)
+
+# Files are handed to hashing threads in groups; smaller sets are hashed inline
+HASH_BATCH_SIZE = 8
+HASH_BATCH_MIN_SIZE = 4
+
+DEFAULT_SCAN_WORKERS = min(8, os.cpu_count() or 1)
+
+# Directories with more subdirectories than this are fanned out to other
+# scan workers; narrower subtrees are walked inline by the current worker
+PARALLEL_SCAN_MIN_SUBDIRS = 4
+
+# Required configuration sections and the fields each section must define
+REQUIRED_CONFIG_FIELDS: Dict[str, List[str]] = {
+    'source_directories': [],
+    'target_directory': [],
+    'organization': ['by_date', 'remove_duplicates'],
+    'file_types': [],
+    'logging': ['level', 'file'],
+    'backup': ['enabled', 'keep_original', 'verify_copy'],
+    'processing': [],
+}
+
 @dataclass
 class FileInfo:
     """Data class for storing file information"""
@@ -26,6 +117,8 @@ class FileInfo:
     modified_time: datetime
     file_type: str
     hash: str = ""
+    head_hash: str = ""
+    stat: Optional[os.stat_result] = None
 
 @dataclass
 class ArchiveStats:
@@ -51,6 +144,24 @@ class FileArchiver:
         self.target_dir = Path(self.config['target_directory']).expanduser()
         self.file_types = self.config['file_types']
         
+        # Inverted extension lookup; the first matching type wins
+        self._ext_to_type: Dict[str, str] = {}
+        for file_type, extensions in self.file_types.items():
+            for ext in extensions:
+                self._ext_to_type.setdefault(ext.lower(), file_type)
+        
+        self.hash_algo = self.config['processing'].get('hash_algo', DEFAULT_HASH_ALGORITHM)
+        self._hash_factory = self._get_hash_factory(self.hash_algo)
+        self.hash_workers = self.config['processing'].get('hash_workers', DEFAULT_HASH_WORKERS)
+        self.scan_workers = self.config['processing'].get('scan_workers', DEFAULT_SCAN_WORKERS)
+        self._created_dirs: Set[Path] = set()
+        self._existing_names: Dict[Path, Set[str]] = {}
+        self._reflink_unsupported: Set[int] = set()
+        
+        # fsync each copy and its destination directory so archived files
+        # survive a power loss; off by default as it is much slower
+        self.durable = self.config['backup'].get('durable', False)
+        
         # Set up logging based on config
         self._setup_logging(
             level=self.config['logging']['level'],
@@ -63,39 +174,13 @@ class FileArchiver:
             with open(config_path, 'r', encoding='utf-8') as f:
                 config = json.load(f)
                 
-            # Validate required fields
-            required_fields = [
-                'source_directories',
-                'target_directory',
-                'organization',
-                'file_types',
-                'logging',
-                'backup',
-                'processing'
-            ]
-            
-            # Validate required sub-fields
-            if 'organization' in config:
-                required_org_fields = ['by_date', 'remove_duplicates']
-                for field in required_org_fields:
-                    if field not in config['organization']:
-                        raise KeyError(f"Missing required field in organization: {field}")
-            
-            if 'backup' in config:
-                required_backup_fields = ['enabled', 'keep_original', 'verify_copy']
-                for field in required_backup_fields:
-                    if field not in config['backup']:
-                        raise KeyError(f"Missing required field in backup: {field}")
-            
-            if 'logging' in config:
-                required_logging_fields = ['level', 'file']
-                for field in required_logging_fields:
-                    if field not in config['logging']:
-                        raise KeyError(f"Missing required field in logging: {field}")
-            
-            for field in required_fields:
-                if field not in config:
-                    raise KeyError(f"Missing required field in config: {field}")
+            # Validate required fields and sub-fields
+            for section, sub_fields in REQUIRED_CONFIG_FIELDS.items():
+                if section not in config:
+                    raise KeyError(f"Missing required field in config: {section}")
+                for field in sub_fields:
+                    if field not in config[section]:
+                        raise KeyError(f"Missing required field in {section}: {field}")
                     
             return config
             
@@ -124,54 +209,229 @@ class FileArchiver:
             ]
         )
     
-    def get_file_info(self, file_path: Path) -> FileInfo:
-        """Get detailed information about a file"""
-        stats = file_path.stat()
+    def get_file_info(self, file: Union[Path, os.DirEntry]) -> FileInfo:
+        """
+        Get detailed information about a file
+        
+        Args:
+            file: Path of the file, or a DirEntry from os.scandir whose
+                cached stat result avoids an extra syscall
+        """
+        if isinstance(file, os.DirEntry):
+            stats = file.stat(follow_symlinks=False)
+            file_path = Path(file.path)
+        else:
+            stats = file.stat()
+            file_path = file
         return FileInfo(
             path=file_path,
             size=stats.st_size,
             created_time=datetime.fromtimestamp(stats.st_ctime),
             modified_time=datetime.fromtimestamp(stats.st_mtime),
-            file_type=self._get_file_type(file_path.suffix.lower())
+            file_type=self._get_file_type(file_path.suffix.lower()),
+            stat=stats
         )
     
     def _get_file_type(self, extension: str) -> str:
         """Determine file type based on extension"""
-        for file_type, extensions in self.file_types.items():
-            if extension in extensions:
-                return file_type
-        return 'others'
+        return self._ext_to_type.get(extension, 'others')
+    
+    def _scan_directory(self, directory: str) -> Tuple[List[FileInfo], List[str]]:
+        """
+        Scan a directory tree with os.scandir
+        
+        Symbolic links are not followed; links to files are skipped rather
+        than archiving their targets.
+        
+        Narrow subtrees are walked inline; subdirectories of wide directories
+        are returned so they can be scanned by other workers.
+        
+        Returns:
+            Tuple of files found and subdirectories left to scan
+        """
+        files = []
+        fan_out = []
+        stack = [directory]
+        
+        while stack:
+            current = stack.pop()
+            subdirs = []
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            files.append(self.get_file_info(entry))
+            except OSError as e:
+                logger.error(f"Error scanning directory {current}: {str(e)}")
+                continue
+            
+            if len(subdirs) > PARALLEL_SCAN_MIN_SUBDIRS:
+                fan_out.extend(subdirs)
+            else:
+                stack.extend(subdirs)
+        
+        return files, fan_out
+    
+    def _walk_directory(self, executor: ThreadPoolExecutor, source_dir: Path) -> List[FileInfo]:
+        """Walk a source directory, spreading wide subtrees across the executor"""
+        files = []
+        pending = {executor.submit(self._scan_directory, str(source_dir))}
+        
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                dir_files, subdirs = future.result()
+                files.extend(dir_files)
+                pending.update(executor.submit(self._scan_directory, d) for d in subdirs)
+        
+        # Keep results deterministic regardless of worker scheduling
+        files.sort(key=lambda file_info: file_info.path)
+        return files
     
     def scan_files(self) -> List[FileInfo]:
         """Scan source directories for files"""
         files = []
         
-        for source_dir in self.source_dirs:
-            logger.info(f"Scanning directory: {source_dir}")
-            try:
-                for file_path in source_dir.rglob('*'):
-                    if file_path.is_file():
-                        files.append(self.get_file_info(file_path))
+        with ThreadPoolExecutor(max_workers=max(1, self.scan_workers)) as executor:
+            for source_dir in self.source_dirs:
+                logger.info(f"Scanning directory: {source_dir}")
+                try:
+                    files.extend(self._walk_directory(executor, source_dir))
                 
-            except Exception as e:
-                logger.error(f"Error scanning directory {source_dir}: {str(e)}")
-                continue
+                except Exception as e:
+                    logger.error(f"Error scanning directory {source_dir}: {str(e)}")
+                    continue
         
         logger.info(f"Found {len(files)} files in total")
         return files
     
+    def _get_hash_factory(self, algo: str) -> Callable:
+        """Resolve the configured hash algorithm to a hasher constructor"""
+        if algo == 'xxh3' and xxhash is None:
+            logger.debug("xxhash is not installed, falling back to blake2b")
+            algo = 'blake2b'
+        if algo not in HASH_ALGORITHMS:
+            raise ValueError(f"Unsupported hash algorithm: {algo}")
+        return HASH_ALGORITHMS[algo]
+    
     def get_file_hash(self, file_path: Path) -> str:
-        """Calculate MD5 hash of file"""
-        hasher = hashlib.md5()
+        """
+        Calculate hash of file content
+        
+        Uses the algorithm configured by `processing.hash_algo` (xxh3 by
+        default). The hash only identifies duplicates and verifies copies,
+        so MD5's collision resistance is not required.
+        """
         try:
             with open(file_path, 'rb') as f:
-                for chunk in iter(lambda: f.read(4096), b''):
-                    hasher.update(chunk)
-            return hasher.hexdigest()
+                if os.fstat(f.fileno()).st_size > MMAP_MIN_SIZE:
+                    hasher = self._hash_factory()
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        hasher.update(mm)
+                    return hasher.hexdigest()
+                
+                if sys.version_info >= (3, 11):
+                    return hashlib.file_digest(f, self._hash_factory).hexdigest()
+                
+                hasher = self._hash_factory()
+                buffer = bytearray(HASH_BUFFER_SIZE)
+                view = memoryview(buffer)
+                while True:
+                    size = f.readinto(buffer)
+                    if not size:
+                        break
+                    hasher.update(view[:size])
+                return hasher.hexdigest()
         except Exception as e:
             logger.error(f"Error calculating hash for {file_path}: {str(e)}")
             return ""
     
+    def get_head_hash(self, file_path: Path) -> str:
+        """Calculate hash of the first HEAD_HASH_SIZE bytes of file"""
+        buffer = bytearray(HEAD_HASH_SIZE)
+        try:
+            with open(file_path, 'rb') as f:
+                size = f.readinto(buffer)
+            hasher = self._hash_factory()
+            hasher.update(memoryview(buffer)[:size])
+            return hasher.hexdigest()
+        except Exception as e:
+            logger.error(f"Error calculating head hash for {file_path}: {str(e)}")
+            return ""
+    
+    def _hash_concurrently(self, hash_func: Callable, files: List[FileInfo]) -> List[str]:
+        """
+        Apply hash_func to each file's path using the hashing thread pool
+        
+        Paths are submitted in batches of HASH_BATCH_SIZE so that archives
+        of many small files are not dominated by per-task scheduling cost.
+        """
+        paths = [file_info.path for file_info in files]
+        if self.hash_workers <= 1 or len(paths) < HASH_BATCH_MIN_SIZE:
+            return [hash_func(path) for path in paths]
+        
+        def hash_batch(batch: List[Path]) -> List[str]:
+            return [hash_func(path) for path in batch]
+        
+        batches = [paths[i:i + HASH_BATCH_SIZE] for i in range(0, len(paths), HASH_BATCH_SIZE)]
+        with ThreadPoolExecutor(max_workers=self.hash_workers) as executor:
+            return [h for batch_hashes in executor.map(hash_batch, batches) for h in batch_hashes]
+    
+    def _group_hardlinks(self, files: List[FileInfo]) -> List[List[FileInfo]]:
+        """Group files that are hardlinks to the same inode"""
+        links: Dict[object, List[FileInfo]] = defaultdict(list)
+        for file_info in files:
+            stat = file_info.stat
+            # st_ino is 0 where scandir does not report it (e.g. Windows)
+            if stat is not None and stat.st_ino:
+                links[(stat.st_dev, stat.st_ino)].append(file_info)
+            else:
+                links[id(file_info)].append(file_info)
+        return list(links.values())
+    
+    def compute_hashes(self, files: List[FileInfo]) -> None:
+        """
+        Hash files concurrently and store the result on each FileInfo
+        
+        Files are matched progressively: a hash of the first HEAD_HASH_SIZE
+        bytes is computed first, and only files whose (size, head_hash)
+        collides with another file are read in full. Hardlinks share their
+        data, so only one path per (st_dev, st_ino) is ever read.
+        """
+        link_groups = self._group_hardlinks(files)
+        primaries = [group[0] for group in link_groups]
+        primary_ids = {id(file_info) for file_info in primaries}
+        
+        for file_info, head_hash in zip(primaries, self._hash_concurrently(self.get_head_hash, primaries)):
+            file_info.head_hash = head_hash
+        for group in link_groups:
+            for file_info in group[1:]:
+                file_info.head_hash = group[0].head_hash
+        
+        head_map: Dict[tuple, List[FileInfo]] = defaultdict(list)
+        for file_info in files:
+            if file_info.head_hash:
+                head_map[(file_info.size, file_info.head_hash)].append(file_info)
+        
+        candidates = []
+        for group in head_map.values():
+            if len(group) < 2:
+                continue
+            for file_info in group:
+                # The head hash already covers the whole content of small files
+                if file_info.size <= HEAD_HASH_SIZE:
+                    file_info.hash = file_info.head_hash
+                elif id(file_info) in primary_ids:
+                    candidates.append(file_info)
+        
+        for file_info, file_hash in zip(candidates, self._hash_concurrently(self.get_file_hash, candidates)):
+            file_info.hash = file_hash
+        for group in link_groups:
+            for file_info in group[1:]:
+                file_info.hash = group[0].hash
+    
     def organize_files(self):
         """Organize files according to configuration"""
         files = self.scan_files()
@@ -186,89 +446,238 @@ class FileArchiver:
         )
         
         logger.info(f"Starting to process {total} files...")
+        remove_duplicates = self.config['organization']['remove_duplicates']
+        by_date = self.config['organization']['by_date']
+        backup_enabled = self.config['backup']['enabled']
+        keep_original = self.config['backup']['keep_original']
+        target_dir = self.target_dir
+        created_dirs = self._created_dirs
+        file_type_stats = stats.by_type
+        log_info = logger.isEnabledFor(logging.INFO)
+        last_progress_count = 0
+        last_progress_time = time.monotonic()
+        
+        # Hash files up front in parallel; the dedup check below stays serial.
+        # Files with a unique size cannot have duplicates and are never hashed.
+        if remove_duplicates:
+            size_map: Dict[int, List[FileInfo]] = defaultdict(list)
+            for file_info in files:
+                size_map[file_info.size].append(file_info)
+            self.compute_hashes([
+                file_info
+                for group in size_map.values() if len(group) > 1
+                for file_info in group
+            ])
         
         for file_info in files:
             try:
                 # Update file type statistics
-                stats.by_type[file_info.file_type] = stats.by_type.get(file_info.file_type, 0) + 1
+                file_type_stats[file_info.file_type] = file_type_stats.get(file_info.file_type, 0) + 1
                 stats.total_size += file_info.size
                 
                 # Check for duplicates if enabled
-                if self.config['organization']['remove_duplicates']:
-                    file_hash = self.get_file_hash(file_info.path)
+                if remove_duplicates and file_info.hash:
+                    file_hash = file_info.hash
                     if file_hash in processed_hashes:
-                        original_file = processed_hashes[file_hash]
-                        logger.info(f"Found duplicate file: {file_info.path} is identical to {original_file}")
+                        if log_info:
+                            original_file = processed_hashes[file_hash]
+                            logger.info(f"Found duplicate file: {file_info.path} is identical to {original_file}")
                         stats.duplicates += 1
                         continue
                     processed_hashes[file_hash] = str(file_info.path)
                 
                 # Determine target path based on configuration
-                if self.config['organization']['by_date']:
+                if by_date:
                     date_path = f"{file_info.created_time.year}/{file_info.created_time.month:02d}"
-                    target_path = self.target_dir / file_info.file_type / date_path
+                    target_path = target_dir / file_info.file_type / date_path
                 else:
-                    target_path = self.target_dir / file_info.file_type
+                    target_path = target_dir / file_info.file_type
                 
-                # Create directory and handle file
-                target_path.mkdir(parents=True, exist_ok=True)
+                # Create directory once per run and handle file
+                if target_path not in created_dirs:
+                    target_path.mkdir(parents=True, exist_ok=True)
+                    created_dirs.add(target_path)
                 
                 # Generate unique filename
                 target_filename = self._generate_unique_filename(target_path, file_info.path.name)
                 target_file = target_path / target_filename
                 
-                if self.config['backup']['enabled']:
-                    if self._safe_copy(file_info.path, target_file):
-                        logger.info(f"Copied {file_info.path} to {target_file}")
+                if backup_enabled:
+                    if self._safe_copy(file_info.path, target_file, file_info.hash):
+                        if log_info:
+                            logger.info(f"Copied {file_info.path} to {target_file}")
                         stats.processed_files += 1
                         
-                        if not self.config['backup']['keep_original']:
+                        if not keep_original:
                             file_info.path.unlink()
-                            logger.info(f"Removed original file: {file_info.path}")
+                            if log_info:
+                                logger.info(f"Removed original file: {file_info.path}")
                     else:
                         stats.failed_files += 1
                 
                 processed += 1
-                if processed % 10 == 0:  # Show progress every 10 files
+                if log_info and (
+                    processed - last_progress_count >= PROGRESS_LOG_FILES
+                    or time.monotonic() - last_progress_time >= PROGRESS_LOG_INTERVAL
+                ):
                     logger.info(f"Progress: {processed}/{total} ({processed/total*100:.1f}%)")
+                    last_progress_count = processed
+                    last_progress_time = time.monotonic()
                 
             except Exception as e:
                 logger.error(f"Error processing {file_info.path}: {str(e)}")
                 stats.failed_files += 1
         
+        # Persist the renamed directory entries once per destination directory
+        if self.durable and backup_enabled:
+            for directory in created_dirs:
+                self._fsync_path(directory)
+        
         # Generate and display report
         report = self.generate_report(stats)
         logger.info("\n" + report)
     
     def _generate_unique_filename(self, target_path: Path, original_name: str) -> str:
-        """Generate a unique filename to avoid conflicts"""
+        """
+        Generate a unique filename to avoid conflicts
+        
+        The target directory is listed once and its names are cached, so
+        probing for a free name does not cost a syscall per attempt. The
+        returned name is reserved in the cache. Names are compared
+        case-insensitively on Windows and macOS.
+        """
+        existing = self._existing_names.get(target_path)
+        if existing is None:
+            try:
+                existing = {_name_key(entry) for entry in os.listdir(target_path)}
+            except FileNotFoundError:
+                existing = set()
+            self._existing_names[target_path] = existing
+        
         name = Path(original_name).stem
         suffix = Path(original_name).suffix
         counter = 1
         new_name = original_name
         
-        while (target_path / new_name).exists():
+        while _name_key(new_name) in existing:
             new_name = f"{name}_{counter}{suffix}"
             counter += 1
         
+        existing.add(_name_key(new_name))
         return new_name
     
     def verify_file_integrity(self, source_path: Path, target_path: Path) -> bool:
-        """Verify file integrity using MD5 hash"""
+        """Verify file integrity by comparing content hashes"""
         source_hash = self.get_file_hash(source_path)
         target_hash = self.get_file_hash(target_path)
         return source_hash == target_hash
     
-    def _safe_copy(self, source: Path, target: Path) -> bool:
-        """Safe file copy with verification and error recovery"""
+    def _reflink(self, source: Path, target: Path) -> bool:
+        """
+        Clone source into target as a copy-on-write reflink
+        
+        Returns False without copying anything when the filesystem does not
+        support cloning; source devices that fail are not tried again.
+        """
+        if fcntl is None:
+            return False
+        
+        with open(source, 'rb') as src:
+            device = os.fstat(src.fileno()).st_dev
+            if device in self._reflink_unsupported:
+                return False
+            try:
+                with open(target, 'wb') as dst:
+                    fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            except OSError:
+                self._reflink_unsupported.add(device)
+                target.unlink(missing_ok=True)
+                return False
+        
+        shutil.copystat(source, target)
+        return True
+    
+    def _copy_and_hash(self, source: Path, target: Path) -> str:
+        """Copy file contents and metadata, returning the hash of the bytes read"""
+        hasher = self._hash_factory()
+        buffer = bytearray(HASH_BUFFER_SIZE)
+        view = memoryview(buffer)
+        
+        with open(source, 'rb') as src, open(target, 'wb') as dst:
+            while True:
+                size = src.readinto(buffer)
+                if not size:
+                    break
+                hasher.update(view[:size])
+                dst.write(view[:size])
+        
+        shutil.copystat(source, target)
+        return hasher.hexdigest()
+    
+    def _fsync_path(self, path: Path) -> None:
+        """
+        Flush a file or directory to disk
+        
+        Opening read-only works for both on POSIX and keeps working when the
+        copy inherited a read-only mode from its source. Platforms that
+        cannot sync this way (e.g. Windows) only get a warning.
+        """
         try:
-            # Create temporary file
-            temp_target = target.with_suffix(target.suffix + '.tmp')
-            shutil.copy2(source, temp_target)
+            fd = os.open(path, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        except OSError as e:
+            logger.warning(f"Could not fsync {path}: {str(e)}")
+    
+    def _commit_copy(self, temp_target: Path, target: Path) -> None:
+        """Move a finished copy into place, syncing its data first in durable mode"""
+        if self.durable:
+            self._fsync_path(temp_target)
+        temp_target.rename(target)
+    
+    def _safe_copy(self, source: Path, target: Path, expected_hash: str = None) -> bool:
+        """
+        Safe file copy with verification and error recovery
+        
+        On filesystems that support it (btrfs, XFS) the file is cloned as a
+        reflink without moving any data. Otherwise, without verification or
+        when the source hash is already known, shutil.copy2 copies in kernel
+        space (sendfile on Linux). In the remaining case the source is hashed
+        while it is being copied, so each byte is read once from the source
+        and once more from the target to verify it.
+        
+        Args:
+            source: File to copy
+            target: Destination path
+            expected_hash: Already known hash of source, if any; the source
+                is not hashed again when provided
+        """
+        # Create temporary file
+        temp_target = target.with_suffix(target.suffix + '.tmp')
+        try:
+            # A clone shares the source's data blocks, so there is nothing to verify
+            if self._reflink(source, temp_target):
+                self._commit_copy(temp_target, target)
+                return True
+            
+            if not self.config['backup']['verify_copy']:
+                shutil.copy2(source, temp_target)
+                self._commit_copy(temp_target, target)
+                return True
+            
+            if expected_hash:
+                shutil.copy2(source, temp_target)
+                source_hash = expected_hash
+                target_hash = self.get_file_hash(temp_target)
+            else:
+                source_hash = self._copy_and_hash(source, temp_target)
+                target_hash = self.get_file_hash(temp_target)
             
             # Verify integrity
-            if self.verify_file_integrity(source, temp_target):
-                temp_target.rename(target)
+            if source_hash and source_hash == target_hash:
+                self._commit_copy(temp_target, target)
                 return True
             else:
                 temp_target.unlink()
@@ -277,8 +686,7 @@ class FileArchiver:
             
         except Exception as e:
             logger.error(f"Failed to copy file {source}: {str(e)}")
-            if temp_target.exists():
-                temp_target.unlink()
+            temp_target.unlink(missing_ok=True)
             return False
     
     def generate_report(self, stats: ArchiveStats):
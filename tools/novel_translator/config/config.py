@@ -31,14 +31,20 @@ DEFAULT_CONFIG = {
     "timeout": 30,  # 请求超时时间(秒)
     "retry_times": 3,  # 重试次数
     "output_format": "txt",  # 输出格式 (txt, epub, docx)
-    "parallel_requests": 3,  # 并行请求数
-    "save_interval": 1,  # 多少段落保存一次进度
+    "parallel_requests": 3,  # 并行请求数（批量翻译时的最大并发请求数）
+    "save_interval": 1,  # 至少多少段落完整保存一次进度
+    "save_interval_seconds": 30,  # 完整保存进度的最短间隔(秒)，期间的译文追加到进度日志
+    "rate_limit_rps": 0,  # 每秒最多发起的批次请求数，0为不限制
+    "rate_limit_cpm": 0,  # 每分钟最多提交的字符数，0为不限制
+    "rate_limit_penalty": 30,  # 遇到限流或超时后降速恢复的时间(秒)
     
     # OpenAI配置
     "openai": {
         "model": "gpt-3.5-turbo",  # 模型选择: gpt-3.5-turbo, gpt-4
         "temperature": 0.3,  # 温度参数，越低越稳定
         "context_size": 3,  # 上下文段落数量
+        "batch_max_segments": 20,  # 批量翻译时每个请求打包的最大段落数
+        "batch_max_tokens": 6000,  # 批量翻译时每个请求的估算token上限
         "system_prompt": "你是一个专业的小说翻译器，请将以下文本翻译成{target_language}，保持原文的风格、情感和文学性。请保留原文的段落结构。"
     },
     
@@ -46,7 +52,9 @@ DEFAULT_CONFIG = {
     "caiyun": {
         "url": "http://api.interpreter.caiyunai.com/v1/translator",
         "direction": "auto",  # 翻译方向，auto为自动检测
-        "request_interval": 0.5,  # 请求间隔(秒)
+        "request_interval": 0.5,  # 请求间隔(秒)，未设置qps时使用
+        "qps": 2,  # 每秒最大请求数（所有并发请求共享）
+        "burst": 1,  # 允许的突发请求数
     },
     
     # DeepL配置
@@ -57,14 +65,18 @@ DEFAULT_CONFIG = {
     
     # 本地化设置
     "cache_dir": str(BASE_DIR / "cache"),  # 缓存目录
+    "translation_cache": True,  # 是否在缓存目录中持久化翻译结果
+    "memory_cache_size": 4096,  # 内存中缓存的译文条数，0表示不使用内存缓存
     "log_dir": str(BASE_DIR / "logs"),  # 日志目录
     "output_dir": str(BASE_DIR / "output"),  # 输出目录
     
     # 高级选项
     "preserve_format": True,  # 保留格式
     "bilingual_output": False,  # 双语对照输出
+    "compress_level": 3,  # EPUB压缩级别(0-9)，越高文件越小、导出越慢
     "glossary_file": "",  # 术语表文件
     "budget_limit": 0,  # 预算限制(元)，0为不限制
+    "exchange_rates": {"USD": 7.2},  # 各货币兑人民币汇率，按引擎货币计价的成本换算成元后再与预算比较
     "debug_mode": False,  # 调试模式
 }
 
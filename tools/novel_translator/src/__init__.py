@@ -4,22 +4,36 @@
 小说翻译工具包
 """
 
-from .translator import NovelTranslator
-from .models import Document, Paragraph, Chapter, TranslationEngine
-from .engines import get_engine, list_engines
-from .output_formats import get_formatter, list_formats
-from .utils import process_novel_text
-
-# 添加GUI相关导出
-try:
-    from .gui import NovelTranslatorGUI
-except ImportError:
-    # GUI依赖可能未安装（如tkinter），此时不导出GUI组件
-    pass
+import importlib
+import importlib.util
 
 __version__ = "0.1.0"
 __author__ = "小说翻译工具开发团队"
 
+# 导出名称到所在模块的映射。子模块会导入翻译引擎等重量级依赖，
+# 因此在首次访问时才导入，使命令行的--help等快速路径无需加载它们
+_LAZY_EXPORTS = {
+    "NovelTranslator": ".translator",
+    "Document": ".models",
+    "Paragraph": ".models",
+    "Chapter": ".models",
+    "TranslationEngine": ".models",
+    "get_engine": ".engines",
+    "list_engines": ".engines",
+    "get_formatter": ".output_formats",
+    "list_formats": ".output_formats",
+    "process_novel_text": ".utils",
+    "NovelTranslatorGUI": ".gui",
+}
+
+def __getattr__(name: str):
+    """首次访问导出名称时导入对应子模块"""
+    if name not in _LAZY_EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
 __all__ = [
     "NovelTranslator",
     "Document",
@@ -33,9 +47,7 @@ __all__ = [
     "process_novel_text",
 ]
 
-# 如果GUI组件可用，添加到__all__
-try:
-    if "NovelTranslatorGUI" in globals():
-        __all__.append("NovelTranslatorGUI")
-except:
-    pass 
\ No newline at end of file
+# 如果GUI依赖（tkinter）可用，添加到__all__
+if importlib.util.find_spec("tkinter") is not None:
+    __all__.append("NovelTranslatorGUI")
+ 
\ No newline at end of file
@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+翻译结果缓存
+"""
+
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# 批量查询时每条SQL语句最多绑定的键数，低于旧版SQLite的999个参数上限
+GET_MANY_CHUNK_SIZE = 500
+
+class TranslationCache:
+    """基于SQLite的持久化翻译缓存，可在多个线程间共享"""
+    
+    def __init__(self, path: str):
+        """
+        初始化缓存
+        
+        Args:
+            path: 缓存数据库文件路径
+        """
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS translations (key BLOB PRIMARY KEY, value TEXT NOT NULL)"
+            )
+            self._conn.commit()
+    
+    @staticmethod
+    def make_key(engine: str, model: str, source_language: str, target_language: str, text: str) -> bytes:
+        """
+        生成缓存键
+        
+        Args:
+            engine: 引擎标识
+            model: 模型名称，没有则为空字符串
+            source_language: 源语言
+            target_language: 目标语言
+            text: 待翻译文本
+        
+        Returns:
+            缓存键
+        """
+        raw = f"{engine}|{model}|{source_language}|{target_language}|{text}"
+        return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).digest()
+    
+    def get(self, key: bytes) -> Optional[str]:
+        """
+        读取缓存
+        
+        Args:
+            key: 缓存键
+        
+        Returns:
+            缓存的译文，未命中返回None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM translations WHERE key = ?", (key,)
+            ).fetchone()
+        return row[0] if row else None
+    
+    def get_many(self, keys: List[bytes]) -> Dict[bytes, str]:
+        """
+        批量读取缓存，每GET_MANY_CHUNK_SIZE个键一条查询
+        
+        Args:
+            keys: 缓存键列表
+        
+        Returns:
+            命中的缓存键到译文的映射
+        """
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), GET_MANY_CHUNK_SIZE):
+                chunk = keys[i:i + GET_MANY_CHUNK_SIZE]
+                placeholders = ",".join("?" * len(chunk))
+                found.update(self._conn.execute(
+                    f"SELECT key, value FROM translations WHERE key IN ({placeholders})", chunk
+                ).fetchall())
+        return found
+    
+    def set(self, key: bytes, value: str) -> None:
+        """
+        写入缓存
+        
+        Args:
+            key: 缓存键
+            value: 译文
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO translations (key, value) VALUES (?, ?)", (key, value)
+            )
+            self._conn.commit()
+    
+    def close(self) -> None:
+        """关闭缓存数据库"""
+        with self._lock:
+            self._conn.close()
+
+class MemoryCache:
+    """容量有限的内存LRU缓存，可在多个线程间共享"""
+    
+    def __init__(self, max_size: int = 4096):
+        """
+        初始化缓存
+        
+        Args:
+            max_size: 最多缓存的条目数
+        """
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._data = OrderedDict()
+    
+    def get(self, key: bytes) -> Optional[str]:
+        """
+        读取缓存
+        
+        Args:
+            key: 缓存键
+        
+        Returns:
+            缓存的译文，未命中返回None
+        """
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+    
+    def set(self, key: bytes, value: str) -> None:
+        """
+        写入缓存，超出容量时淘汰最久未使用的条目
+        
+        Args:
+            key: 缓存键
+            value: 译文
+        """
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.max_size:
+                self._data.popitem(last=False)
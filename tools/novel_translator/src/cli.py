@@ -5,15 +5,20 @@ import os
 import sys
 import argparse
 import time
+import queue
+import signal
+import concurrent.futures
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, TYPE_CHECKING
 
-from .translator import NovelTranslator
-from .models import Document
-from .config import load_config, save_config, TranslationConfig
-from .utils import detect_file_encoding, read_text_file
+from .config import load_config, save_config
 from . import __version__
 
+# 翻译器会导入翻译引擎及其第三方依赖，推迟到真正需要翻译时再导入，
+# 使--help、--version和--save-config保持快速启动
+if TYPE_CHECKING:
+    from .translator import NovelTranslator
+
 def create_parser() -> argparse.ArgumentParser:
     """创建命令行参数解析器"""
     parser = argparse.ArgumentParser(
@@ -30,12 +35,15 @@ def create_parser() -> argparse.ArgumentParser:
     parser.add_argument('-t', '--target-lang', help='目标语言')
     parser.add_argument('-g', '--glossary', help='术语表文件路径')
     parser.add_argument('-c', '--config', help='指定配置文件路径')
+    parser.add_argument('--cache-dir', help='翻译缓存目录')
     parser.add_argument('--context-level', type=int, choices=[0, 1, 2, 3], 
                        help='上下文模式 (0:无 1:段落 2:章节 3:全文)')
     parser.add_argument('--save-config', action='store_true', 
                        help='将当前参数保存为默认配置')
     parser.add_argument('--batch', action='store_true',
                        help='批量模式，输入参数为包含多个文件的目录')
+    parser.add_argument('--workers', type=int,
+                       help='批量模式下同时翻译的文件数 (默认: min(8, 文件数))')
     parser.add_argument('--verbose', '-v', action='count', default=0,
                        help='详细输出模式')
     parser.add_argument('--version', action='version',
@@ -72,7 +80,7 @@ def get_output_path(input_path: str, output_path: Optional[str], format: str) ->
     stem = input_file.stem
     return str(input_file.parent / f"{stem}_翻译.{format}")
 
-def process_file(translator: NovelTranslator, input_path: str, 
+def process_file(translator: 'NovelTranslator', input_path: str, 
                 output_path: str, output_format: str, verbose: int) -> bool:
     """处理单个文件的翻译"""
     try:
@@ -85,17 +93,46 @@ def process_file(translator: NovelTranslator, input_path: str,
         
         if verbose:
             print(f"翻译完成，用时 {end_time - start_time:.2f} 秒")
+            sys.stdout.flush()
         return True
     except Exception as e:
-        print(f"翻译出错: {e}")
+        print(f"翻译出错: {e}", flush=True)
         if verbose > 1:
             import traceback
             traceback.print_exc()
         return False
 
-def batch_process(translator: NovelTranslator, input_dir: str, 
-                 output_dir: Optional[str], output_format: str, verbose: int) -> Tuple[int, int]:
-    """批量处理目录中的所有文本文件"""
+def install_interrupt_handler(translators: List['NovelTranslator']) -> None:
+    """
+    注册中断信号处理器，中断时保存所有翻译器正在翻译的文档进度后退出
+    
+    翻译器自身不注册信号处理器，批量模式下由这里统一处理。工作线程中的网络请求
+    无法被中断，保存进度后直接结束进程，不等待线程池退出。
+    
+    Args:
+        translators: 翻译器列表，中断时读取，之后加入的翻译器同样生效
+    """
+    def handle_interrupt(signum, frame):
+        print("\n接收到中断信号，保存进度并退出...")
+        for translator in list(translators):
+            progress_file = translator.save_current_progress()
+            if progress_file:
+                print(f"进度已保存至: {progress_file}")
+        sys.stdout.flush()
+        os._exit(130)
+    
+    signal.signal(signal.SIGINT, handle_interrupt)
+    signal.signal(signal.SIGTERM, handle_interrupt)
+
+def batch_process(translators: List['NovelTranslator'], input_dir: str, 
+                 output_dir: Optional[str], output_format: str, verbose: int,
+                 workers: Optional[int] = None) -> Tuple[int, int]:
+    """
+    批量处理目录中的所有文本文件，多个文件并行翻译
+    
+    每个工作线程独占一个翻译器，translators不足工作线程数时由第一个翻译器补充，
+    补充的翻译器共享同一个翻译引擎、缓存和限速器，配置的限速对整个批次生效。
+    """
     input_path = Path(input_dir)
     output_path = Path(output_dir) if output_dir else input_path
     
@@ -105,27 +142,59 @@ def batch_process(translator: NovelTranslator, input_dir: str,
     success_count = 0
     fail_count = 0
     
-    # 查找所有文本文件
-    extensions = ['.txt', '.md']
-    files = []
-    for ext in extensions:
-        files.extend(input_path.glob(f"*{ext}"))
+    # 查找所有文本文件，只遍历一次目录，同时生成输入和输出路径字符串
+    extensions = {'.txt', '.md'}
+    out_dir_str = os.fspath(output_path)
+    names = []
+    in_paths = []
+    out_paths = []
+    with os.scandir(input_path) as entries:
+        for entry in entries:
+            stem, ext = os.path.splitext(entry.name)
+            if ext.lower() in extensions and entry.is_file(follow_symlinks=False):
+                names.append(entry.name)
+                in_paths.append(entry.path)
+                out_paths.append(os.path.join(out_dir_str, f"{stem}_翻译.{output_format}"))
     
-    total_files = len(files)
+    total_files = len(in_paths)
     if verbose:
         print(f"找到 {total_files} 个文件需要翻译")
     
-    for i, file in enumerate(files, 1):
-        if verbose:
-            print(f"[{i}/{total_files}] 处理文件: {file.name}")
-        
-        output_file = output_path / f"{file.stem}_翻译.{output_format}"
+    if not in_paths:
+        return success_count, fail_count
+    
+    # 翻译以网络请求为主，多个文件可并行处理
+    max_workers = workers or min(8, total_files)
+    
+    # 翻译器在翻译时会修改自身的配置和当前文档，每个工作线程独占一个翻译器
+    while len(translators) < max_workers:
+        translators.append(translators[0].spawn())
+    idle = queue.Queue()
+    for translator in translators:
+        idle.put(translator)
+    
+    def run(in_file: str, out_file: str) -> bool:
+        translator = idle.get()
+        try:
+            return process_file(translator, in_file, out_file, output_format, verbose)
+        finally:
+            idle.put(translator)
+    
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = []
+        for i, (name, in_file, out_file) in enumerate(zip(names, in_paths, out_paths), 1):
+            if verbose:
+                print(f"[{i}/{total_files}] 处理文件: {name}")
+            
+            futures.append(executor.submit(run, in_file, out_file))
         
-        if process_file(translator, str(file), str(output_file), output_format, verbose):
-            success_count += 1
-        else:
-            fail_count += 1
+        for future in concurrent.futures.as_completed(futures):
+            if future.result():
+                success_count += 1
+            else:
+                fail_count += 1
     
+    sys.stdout.flush()
     return success_count, fail_count
 
 def main() -> int:
@@ -133,6 +202,11 @@ def main() -> int:
     parser = create_parser()
     args = parser.parse_args()
     
+    # 终端下stdout默认逐行刷新，批量翻译时大量进度行会产生大量小的写入；
+    # 关闭行缓冲后在每个文件结束时统一刷新，-vv调试模式下仍保持逐行输出
+    if args.verbose < 2 and hasattr(sys.stdout, "reconfigure"):
+        sys.stdout.reconfigure(line_buffering=False)
+    
     # 加载配置
     config_path = args.config
     config = load_config(config_path)
@@ -148,6 +222,8 @@ def main() -> int:
         config.glossary_path = args.glossary
     if args.context_level is not None:
         config.context_level = args.context_level
+    if args.cache_dir:
+        config.cache_dir = args.cache_dir
     
     # 保存配置（如果需要）
     if args.save_config:
@@ -164,17 +240,21 @@ def main() -> int:
     
     try:
         # 创建翻译器
-        translator = NovelTranslator(config)
+        from .translator import NovelTranslator
+        translator = NovelTranslator(config, handle_signals=False)
+        translators = [translator]
+        install_interrupt_handler(translators)
         
         if args.batch:
             # 批量处理
             output_dir = args.output
             success, fail = batch_process(
-                translator, 
+                translators, 
                 args.input_file, 
                 output_dir, 
                 args.format, 
-                args.verbose
+                args.verbose,
+                args.workers
             )
             print(f"批量翻译完成: {success} 个成功, {fail} 个失败")
         else:
@@ -4,17 +4,37 @@
 翻译引擎包初始化
 """
 
-from typing import Dict, Any, Type
+import functools
+import importlib
+from typing import Dict, Any, Tuple, Type
 from ..models import TranslationEngine
-from .caiyun_engine import CaiyunTranslationEngine
-from .openai_engine import OpenAITranslationEngine
 
-# 注册所有引擎
+# 注册所有引擎：引擎名 -> (模块名, 类名)
+# 引擎模块在首次使用时才导入，未使用的引擎不会加载其SDK
 ENGINE_REGISTRY = {
-    "caiyun": CaiyunTranslationEngine,
-    "openai": OpenAITranslationEngine,
+    "caiyun": (".caiyun_engine", "CaiyunTranslationEngine"),
+    "openai": (".openai_engine", "OpenAITranslationEngine"),
 }
 
+def get_engine_class(name: str) -> Type[TranslationEngine]:
+    """
+    获取翻译引擎类，按需导入其所在模块
+    
+    Args:
+        name: 引擎名称
+        
+    Returns:
+        翻译引擎类
+    
+    Raises:
+        ValueError: 引擎不存在
+    """
+    if name not in ENGINE_REGISTRY:
+        raise ValueError(f"不支持的翻译引擎: {name}")
+    
+    module_name, class_name = ENGINE_REGISTRY[name]
+    return getattr(importlib.import_module(module_name, __name__), class_name)
+
 def get_engine(name: str, config: Dict[str, Any]) -> TranslationEngine:
     """
     获取翻译引擎实例
@@ -29,16 +49,14 @@ def get_engine(name: str, config: Dict[str, Any]) -> TranslationEngine:
     Raises:
         ValueError: 引擎不存在
     """
-    if name not in ENGINE_REGISTRY:
-        raise ValueError(f"不支持的翻译引擎: {name}")
-    
-    return ENGINE_REGISTRY[name](config)
+    return get_engine_class(name)(config)
 
-def list_engines() -> Dict[str, Type[TranslationEngine]]:
+@functools.cache
+def list_engines() -> Tuple[str, ...]:
     """
     列出所有支持的翻译引擎
     
     Returns:
-        翻译引擎字典
+        翻译引擎名称元组
     """
-    return ENGINE_REGISTRY 
\ No newline at end of file
+    return tuple(ENGINE_REGISTRY) 
\ No newline at end of file
@@ -5,13 +5,25 @@
 """
 
 import requests
-import json
-import time
+from requests.adapters import HTTPAdapter
 from typing import List, Dict, Any
 import os
-from ..models import TranslationEngine
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential_jitter
+from ..models import (
+    TranslationEngine, TransientHTTPError, PermanentHTTPError, TRANSIENT_STATUS_CODES, parse_retry_after
+)
+from ..rate_limiter import shared_limiter
 from ..config import CAIYUN_API_KEY, LANGUAGE_MAP
 
+_exponential_wait = wait_exponential_jitter(initial=1, max=30)
+
+def _wait_retry_after(retry_state) -> float:
+    """服务端给出Retry-After时按其等待，否则使用带抖动的指数退避"""
+    error = retry_state.outcome.exception()
+    if isinstance(error, TransientHTTPError) and error.retry_after is not None:
+        return error.retry_after
+    return _exponential_wait(retry_state)
+
 class CaiyunTranslationEngine(TranslationEngine):
     """彩云小译翻译引擎"""
     
@@ -25,6 +37,34 @@ class CaiyunTranslationEngine(TranslationEngine):
         self.url = config.get("caiyun", {}).get("url", "http://api.interpreter.caiyunai.com/v1/translator")
         self.direction = config.get("caiyun", {}).get("direction", "auto")
         self.request_interval = config.get("caiyun", {}).get("request_interval", 0.5)
+        self.timeout = (5, config.get("timeout", 30))  # (连接超时, 读取超时)
+        
+        # 同一接口和密钥的所有请求共享进程内的同一个令牌桶，多个引擎实例并行时
+        # qps上限同样有效；未配置qps时按请求间隔换算
+        qps = config.get("caiyun", {}).get("qps")
+        if qps is None:
+            qps = 1 / self.request_interval if self.request_interval > 0 else 0
+        self.limiter = shared_limiter(
+            ("caiyun", self.url, self.api_key), qps, config.get("caiyun", {}).get("burst", 1)
+        )
+        
+        # 复用同一个会话，保持HTTP长连接，避免每次请求重新握手
+        # 重试统一由translate上的@retry处理，连接池本身不再重试
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        
+        # 请求头在引擎生命周期内不变，content-type由requests根据json参数设置
+        self.headers = {"x-authorization": f"token {self.api_key}"}
+        
+        # 源语言和目标语言在引擎生命周期内不变，预先生成请求体中的固定字段
+        self._trans_type = f"{self._get_language_code(self.source_language)}2{self._get_language_code(self.target_language)}"
+        self._payload_template = {
+            "trans_type": self._trans_type,
+            "request_id": "demo",
+            "detect": True,
+        }
         
         # 彩云小译每千字符的成本（人民币）
         self.cost_per_thousand_chars = 0.4 # 按商用价格估算
@@ -32,48 +72,54 @@ class CaiyunTranslationEngine(TranslationEngine):
     def get_name(self) -> str:
         return "彩云小译"
     
+    @retry(
+        retry=retry_if_exception_type((requests.ConnectionError, requests.Timeout, TransientHTTPError)),
+        stop=stop_after_attempt(5),
+        wait=_wait_retry_after,
+        reraise=True,
+    )
     def translate(self, text: str) -> str:
         """
         使用彩云小译API翻译文本
         
         Args:
             text: 待翻译文本
-            
+        
         Returns:
             翻译后的文本
         """
         if not text.strip():
             return ""
         
-        # 构建请求头
-        headers = {
-            "content-type": "application/json",
-            "x-authorization": f"token {self.api_key}"
-        }
+        # 优先使用缓存
+        cached = self.get_cached(text)
+        if cached is not None:
+            return cached
+        
+        # 等待限速器放行
+        self.limiter.acquire()
         
         # 构建请求体
-        payload = {
-            "source": text,
-            "trans_type": f"{self._get_language_code(self.source_language)}2{self._get_language_code(self.target_language)}",
-            "request_id": "demo",
-            "detect": True,
-        }
+        payload = {**self._payload_template, "source": text}
         
         # 发送请求
-        response = requests.post(self.url, headers=headers, data=json.dumps(payload))
+        response = self.session.post(self.url, headers=self.headers, json=payload, timeout=self.timeout)
         
-        # 检查响应状态
+        # 检查响应状态，限流和服务端错误可重试，其余错误直接失败
+        if response.status_code in TRANSIENT_STATUS_CODES:
+            raise TransientHTTPError(
+                f"翻译请求暂时失败，状态码：{response.status_code}，响应：{response.text}",
+                parse_retry_after(response.headers.get("Retry-After"))
+            )
         if response.status_code != 200:
-            raise Exception(f"翻译请求失败，状态码：{response.status_code}，响应：{response.text}")
+            raise PermanentHTTPError(f"翻译请求失败，状态码：{response.status_code}，响应：{response.text}")
         
         # 解析响应
         result = response.json()
         if "target" not in result:
             raise Exception(f"翻译响应格式错误：{result}")
         
-        # 添加请求间隔以避免频率限制
-        time.sleep(self.request_interval)
-        
+        self.set_cached(text, result["target"])
         return result["target"]
     
     def batch_translate(self, texts: List[str]) -> List[str]:
@@ -82,15 +128,12 @@ class CaiyunTranslationEngine(TranslationEngine):
         
         Args:
             texts: 待翻译文本列表
-            
+        
         Returns:
             翻译后的文本列表
         """
-        # 彩云小译没有批量接口，所以我们顺序翻译
-        results = []
-        for text in texts:
-            results.append(self.translate(text))
-        return results
+        # 彩云小译没有批量接口，所以我们并发发送单条请求
+        return self.translate_concurrently(texts)
     
     def estimate_cost(self, text: str) -> float:
         """
@@ -98,20 +141,37 @@ class CaiyunTranslationEngine(TranslationEngine):
         
         Args:
             text: 待翻译文本
-            
+        
         Returns:
-            估算成本（元）
+            估算成本（元），已缓存的文本为0
         """
+        if self.get_cached(text) is not None:
+            return 0.0
+        
         char_count = len(text)
         return (char_count / 1000) * self.cost_per_thousand_chars
     
+    def estimate_cost_batch(self, texts: List[str]) -> float:
+        """
+        估算一组文本的总翻译成本（人民币）
+        
+        Args:
+            texts: 待翻译文本列表
+        
+        Returns:
+            估算总成本（元），已缓存的文本不计入
+        """
+        # 成本与字符数成正比，先汇总字符数再统一计算
+        total_chars = sum(len(text) for text in self.uncached_texts(texts))
+        return (total_chars / 1000) * self.cost_per_thousand_chars
+    
     def _get_language_code(self, language: str) -> str:
         """
         获取彩云小译的语言代码
         
         Args:
             language: 语言代码
-            
+        
         Returns:
             彩云小译的语言代码
         """
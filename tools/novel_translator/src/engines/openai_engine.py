@@ -5,24 +5,83 @@ OpenAI翻译引擎
 """
 
 import os
+import re
 import time
-from typing import List, Dict, Any
-from openai import OpenAI
+import asyncio
+import logging
+import importlib.util
+import functools
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from tenacity import retry, stop_after_attempt, wait_exponential
 
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
 from ..models import TranslationEngine
 from ..config import OPENAI_API_KEY, LANGUAGE_MAP
 
+logger = logging.getLogger("novel_translator")
+
+# 常见语言的名称映射，LANGUAGE_MAP中未配置时使用
+LANGUAGE_NAMES = {
+    "zh": "Chinese",
+    "en": "English",
+    "ja": "Japanese",
+    "ko": "Korean",
+    "es": "Spanish",
+    "fr": "French",
+    "de": "German",
+    "ru": "Russian",
+    "pt": "Portuguese",
+    "it": "Italian"
+}
+
+# 批量翻译时的片段标记，模型需在译文中原样保留
+SEGMENT_MARKER = "<<<SEG {}>>>"
+SEGMENT_PATTERN = re.compile(r"<<<SEG (\d+)>>>")
+BATCH_INSTRUCTION = (
+    "输入包含多个以<<<SEG 编号>>>标记开头的片段。请逐段翻译，"
+    "并在每段译文前原样保留对应的标记，不要合并、拆分或省略任何片段。"
+)
+
+@functools.lru_cache(maxsize=None)
+def _get_encoding(model: str):
+    """
+    获取模型对应的tiktoken编码器，同一模型只加载一次
+    
+    Args:
+        model: 模型名称
+    
+    Returns:
+        编码器，未安装tiktoken或加载失败时返回None
+    """
+    if tiktoken is None:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # 编码表首次使用时需要下载，离线环境下回退为按字符数估算
+        logger.warning(f"加载tiktoken编码器失败，将按字符数估算token数量: {e}")
+        return None
+
 class OpenAITranslationEngine(TranslationEngine):
     """OpenAI翻译引擎"""
     
+    currency = "USD"
+    
     def __init__(self, config: Dict[str, Any]):
         super().__init__(config)
         self.api_key = config.get("api_key", OPENAI_API_KEY)
         if not self.api_key:
             raise ValueError("OpenAI API密钥未设置")
         
-        # 初始化客户端
+        # 初始化客户端，openai包只在实际使用该引擎时导入
+        from openai import OpenAI
         self.client = OpenAI(api_key=self.api_key)
         
         # OpenAI配置
@@ -34,6 +93,14 @@ class OpenAITranslationEngine(TranslationEngine):
             "你是一个专业的小说翻译器，请将以下文本翻译成{target_language}，保持原文的风格、情感和文学性。请保留原文的段落结构。"
         )
         
+        # 目标语言在引擎生命周期内不变，系统提示只需渲染一次
+        self.target_language_name = self._get_language_name(self.target_language)
+        self.rendered_system_prompt = self.system_prompt.format(target_language=self.target_language_name)
+        
+        # 批量翻译：每个请求中打包的片段数和估算token数上限
+        self.batch_max_segments = openai_config.get("batch_max_segments", 20)
+        self.batch_max_tokens = openai_config.get("batch_max_tokens", 6000)
+        
         # 成本估算（美元/1K tokens）
         self.cost_map = {
             "gpt-3.5-turbo": {
@@ -49,8 +116,9 @@ class OpenAITranslationEngine(TranslationEngine):
                 "output": 0.03
             }
         }
-        self.token_to_char_ratio = 0.75  # 每个token约等于0.75个中文字符或1.5个英文字符
-        
+        self.token_to_char_ratio = 0.75  # 每个token约等于0.75个中文字符或1.5个英文字符，未安装tiktoken时使用
+        self.encoding = _get_encoding(self.model)
+    
     def get_name(self) -> str:
         return f"OpenAI ({self.model})"
     
@@ -61,46 +129,288 @@ class OpenAITranslationEngine(TranslationEngine):
         
         Args:
             text: 待翻译文本
-            
+        
         Returns:
             翻译后的文本
         """
         if not text.strip():
             return ""
         
-        # 替换系统提示中的目标语言
-        target_lang = self._get_language_name(self.target_language)
-        system_prompt = self.system_prompt.format(target_language=target_lang)
+        # 优先使用缓存
+        cached = self.get_cached(text)
+        if cached is not None:
+            return cached
         
         # 调用API
+        translated = "".join(self._stream_completion(self._build_messages(text))).strip()
+        self.set_cached(text, translated)
+        return translated
+    
+    def translate_stream(self, text: str) -> Iterator[str]:
+        """
+        流式翻译文本，在模型生成的同时逐段产出译文
+        
+        Args:
+            text: 待翻译文本
+        
+        Yields:
+            译文片段
+        """
+        if not text.strip():
+            return
+        
+        cached = self.get_cached(text)
+        if cached is not None:
+            yield cached
+            return
+        
+        parts = []
+        for delta in self._stream_completion(self._build_messages(text)):
+            parts.append(delta)
+            yield delta
+        self.set_cached(text, "".join(parts).strip())
+    
+    def _build_messages(self, text: str) -> List[Dict[str, str]]:
+        """构建单段翻译的消息列表"""
+        return [
+            {"role": "system", "content": self.rendered_system_prompt},
+            {"role": "user", "content": text}
+        ]
+    
+    def _stream_completion(self, messages: List[Dict[str, str]]) -> Iterator[str]:
+        """
+        以流式方式调用API
+        
+        Args:
+            messages: 消息列表
+        
+        Yields:
+            模型生成的文本增量
+        """
         response = self.client.chat.completions.create(
             model=self.model,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": text}
-            ],
-            temperature=self.temperature
+            messages=messages,
+            temperature=self.temperature,
+            stream=True
         )
-        
-        # 返回结果
-        return response.choices[0].message.content.strip()
+        for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
     
     def batch_translate(self, texts: List[str]) -> List[str]:
         """
         批量翻译文本
         
+        多个片段会按token预算打包进同一个请求，分摊系统提示和网络往返的开销，
+        各个打包请求之间并发发送。
+        
         Args:
             texts: 待翻译文本列表
-            
+        
         Returns:
             翻译后的文本列表
         """
-        # OpenAI没有批量接口，所以我们顺序翻译
+        results = [""] * len(texts)
+        # 待翻译文本 -> 在texts中的位置，批次内重复的文本只翻译一次
+        pending = {}
+        for i, text in enumerate(texts):
+            if not text.strip():
+                continue
+            if text in pending:
+                pending[text].append(i)
+                continue
+            cached = self.get_cached(text)
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending[text] = [i]
+        
+        if not pending:
+            return results
+        
+        unique_texts = list(pending)
+        bin_texts = [[unique_texts[j] for j in group] for group in self._pack_segments(unique_texts)]
+        
+        if len(bin_texts) == 1 or self.parallel_requests <= 1:
+            translated_bins = [self._translate_bin(group) for group in bin_texts]
+        else:
+            translated_bins = asyncio.run(self._translate_bins_async(bin_texts))
+        
+        for group, translated in zip(bin_texts, translated_bins):
+            for text, result in zip(group, translated):
+                for i in pending[text]:
+                    results[i] = result
+        return results
+    
+    def count_tokens(self, text: str) -> float:
+        """
+        计算文本的token数量
+        
+        安装了tiktoken时按模型的编码器精确计算，否则按字符数估算。
+        
+        Args:
+            text: 文本
+        
+        Returns:
+            token数量
+        """
+        if self.encoding is None:
+            return len(text) * self.token_to_char_ratio
+        return len(self.encoding.encode_ordinary(text))
+    
+    def _pack_segments(self, texts: List[str]) -> List[List[int]]:
+        """
+        按片段数和token预算将文本分组
+        
+        Args:
+            texts: 待翻译文本列表
+        
+        Returns:
+            每组包含的文本下标列表
+        """
+        bins = []
+        current = []
+        current_tokens = 0
+        for i, text in enumerate(texts):
+            tokens = self.count_tokens(text)
+            if current and (len(current) >= self.batch_max_segments
+                            or current_tokens + tokens > self.batch_max_tokens):
+                bins.append(current)
+                current = []
+                current_tokens = 0
+            current.append(i)
+            current_tokens += tokens
+        if current:
+            bins.append(current)
+        return bins
+    
+    def _translate_bin(self, texts: List[str]) -> List[str]:
+        """
+        在一个请求中翻译一组片段
+        
+        若返回的片段标记与输入不一致，则回退为逐段翻译。
+        
+        Args:
+            texts: 待翻译文本列表
+        
+        Returns:
+            翻译后的文本列表
+        """
+        if len(texts) == 1:
+            return [self.translate(texts[0])]
+        
+        segments = self._finish_bin(texts, self._request_bin(texts))
+        if segments is None:
+            return [self.translate(text) for text in texts]
+        return segments
+    
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
+    def _request_bin(self, texts: List[str]) -> str:
+        """发送一个包含多个片段的翻译请求"""
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=self._build_bin_messages(texts),
+            temperature=self.temperature
+        )
+        return response.choices[0].message.content
+    
+    def _build_bin_messages(self, texts: List[str]) -> List[Dict[str, str]]:
+        """构建多片段打包翻译的消息列表"""
+        content = "\n".join(
+            f"{SEGMENT_MARKER.format(n)}\n{text}" for n, text in enumerate(texts, 1)
+        )
+        return [
+            {"role": "system", "content": f"{self.rendered_system_prompt}\n{BATCH_INSTRUCTION}"},
+            {"role": "user", "content": content}
+        ]
+    
+    def _finish_bin(self, texts: List[str], content: str) -> Optional[List[str]]:
+        """
+        拆分打包请求的译文并写入缓存
+        
+        Args:
+            texts: 待翻译文本列表
+            content: 模型返回的译文
+        
+        Returns:
+            翻译后的文本列表，片段标记不完整时返回None
+        """
+        segments = self._parse_segments(content, len(texts))
+        if segments is None:
+            logger.warning(f"批量翻译返回的片段数与输入不一致，改为逐段翻译{len(texts)}个片段")
+            return None
+        
+        for text, translated in zip(texts, segments):
+            self.set_cached(text, translated)
+        return segments
+    
+    def _create_async_client(self):
+        """
+        创建异步客户端
+        
+        所有并发请求共用一个连接池，安装h2时通过HTTP/2在同一连接上多路复用。
+        客户端绑定创建时的事件循环，因此每次批量翻译单独创建。
+        """
+        import httpx
+        from openai import AsyncOpenAI, DEFAULT_TIMEOUT
+        http_client = httpx.AsyncClient(
+            http2=importlib.util.find_spec("h2") is not None,
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=32),
+            timeout=DEFAULT_TIMEOUT
+        )
+        return AsyncOpenAI(api_key=self.api_key, http_client=http_client)
+    
+    async def _translate_bins_async(self, bin_texts: List[List[str]]) -> List[List[str]]:
+        """使用异步客户端并发翻译多个打包请求，结果顺序与输入一致"""
+        async with self._create_async_client() as client:
+            return await self._gather_bounded(
+                lambda group: self._translate_bin_async(client, group), bin_texts
+            )
+    
+    async def _translate_bin_async(self, client, texts: List[str]) -> List[str]:
+        """_translate_bin的异步版本"""
+        if len(texts) > 1:
+            segments = self._finish_bin(texts, await self._request_async(client, self._build_bin_messages(texts)))
+            if segments is not None:
+                return segments
+        
         results = []
         for text in texts:
-            results.append(self.translate(text))
+            translated = (await self._request_async(client, self._build_messages(text))).strip()
+            self.set_cached(text, translated)
+            results.append(translated)
         return results
     
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
+    async def _request_async(self, client, messages: List[Dict[str, str]]) -> str:
+        """通过异步客户端发送一个翻译请求"""
+        response = await client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=self.temperature
+        )
+        return response.choices[0].message.content
+    
+    @staticmethod
+    def _parse_segments(content: str, count: int):
+        """
+        按片段标记拆分批量译文
+        
+        Args:
+            content: 模型返回的译文
+            count: 期望的片段数
+        
+        Returns:
+            按编号排列的译文列表，标记缺失或重复时返回None
+        """
+        parts = SEGMENT_PATTERN.split(content)
+        numbers = [int(number) for number in parts[1::2]]
+        # 每个编号必须恰好出现一次，重复的标记说明片段可能被拆分或错位
+        if sorted(numbers) != list(range(1, count + 1)):
+            return None
+        segments = dict(zip(numbers, (text.strip() for text in parts[2::2])))
+        return [segments[n] for n in range(1, count + 1)]
+    
     def translate_with_context(self, text: str, context_before: List[str] = None, context_after: List[str] = None) -> str:
         """
         使用上下文进行翻译
@@ -109,61 +419,42 @@ class OpenAITranslationEngine(TranslationEngine):
             text: 待翻译文本
             context_before: 前文上下文
             context_after: 后文上下文
-            
+        
         Returns:
             翻译后的文本
         """
         if not text.strip():
             return ""
         
-        # 构建提示
-        target_lang = self._get_language_name(self.target_language)
-        system_prompt = self.system_prompt.format(target_language=target_lang)
-        
-        # 构建消息
+        # 固定的系统提示放在最前面，可被服务端的提示缓存复用；
+        # 上下文随段落移动，每次请求都不同，放在系统提示之后
         messages = [
-            {"role": "system", "content": system_prompt}
+            {"role": "system", "content": self._context_prompt(tuple(context_before or ()), tuple(context_after or ()))},
+            {"role": "user", "content": f"请翻译以下文本，保持原文的风格和语气：\n\n{text}"}
         ]
         
-        # 添加前文上下文
-        if context_before and len(context_before) > 0:
-            context_str = "\n\n".join(context_before)
-            messages.append({
-                "role": "user", 
-                "content": f"以下是前文内容，仅供参考，不需要翻译：\n\n{context_str}"
-            })
-            messages.append({
-                "role": "assistant",
-                "content": "我明白了，这是前文的上下文。"
-            })
-        
-        # 添加后文上下文
-        if context_after and len(context_after) > 0:
-            context_str = "\n\n".join(context_after)
-            messages.append({
-                "role": "user", 
-                "content": f"以下是后文内容，仅供参考，不需要翻译：\n\n{context_str}"
-            })
-            messages.append({
-                "role": "assistant",
-                "content": "我明白了，这是后文的上下文。"
-            })
-        
-        # 添加待翻译文本
-        messages.append({
-            "role": "user",
-            "content": f"请翻译以下文本，保持原文的风格和语气：\n\n{text}"
-        })
-        
         # 调用API
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=messages,
-            temperature=self.temperature
-        )
+        return "".join(self._stream_completion(messages)).strip()
+    
+    def _context_prompt(self, context_before: Tuple[str, ...], context_after: Tuple[str, ...]) -> str:
+        """
+        构建包含上下文的系统提示
+        
+        Args:
+            context_before: 前文上下文
+            context_after: 后文上下文
         
-        # 返回结果
-        return response.choices[0].message.content.strip()
+        Returns:
+            系统提示
+        """
+        parts = [self.rendered_system_prompt]
+        if context_before:
+            context_str = "\n\n".join(context_before)
+            parts.append(f"以下是前文内容，仅供参考，不需要翻译：\n\n{context_str}")
+        if context_after:
+            context_str = "\n\n".join(context_after)
+            parts.append(f"以下是后文内容，仅供参考，不需要翻译：\n\n{context_str}")
+        return "\n\n".join(parts)
     
     def estimate_cost(self, text: str) -> float:
         """
@@ -171,15 +462,15 @@ class OpenAITranslationEngine(TranslationEngine):
         
         Args:
             text: 待翻译文本
-            
+        
         Returns:
-            估算成本（美元）
+            估算成本（美元），已缓存的文本为0
         """
-        if self.model not in self.cost_map:
+        if self.model not in self.cost_map or self.get_cached(text) is not None:
             return 0.0
-            
+        
         # 估算token数量
-        input_tokens = len(text) * self.token_to_char_ratio
+        input_tokens = self.count_tokens(text)
         output_tokens = input_tokens * 1.2  # 假设输出比输入多20%
         
         # 计算成本
@@ -188,31 +479,43 @@ class OpenAITranslationEngine(TranslationEngine):
         
         return input_cost + output_cost
     
+    def estimate_cost_batch(self, texts: List[str]) -> float:
+        """
+        估算一组文本的总翻译成本（美元）
+        
+        Args:
+            texts: 待翻译文本列表
+        
+        Returns:
+            估算总成本（美元），已缓存的文本不计入
+        """
+        if self.model not in self.cost_map:
+            return 0.0
+        
+        texts = self.uncached_texts(texts)
+        # 先汇总token数再统一计算，tiktoken可在多个线程中批量编码
+        if self.encoding is None:
+            input_tokens = sum(len(text) for text in texts) * self.token_to_char_ratio
+        else:
+            input_tokens = sum(map(len, self.encoding.encode_ordinary_batch(texts)))
+        output_tokens = input_tokens * 1.2  # 假设输出比输入多20%
+        
+        input_cost = (input_tokens / 1000) * self.cost_map[self.model]["input"]
+        output_cost = (output_tokens / 1000) * self.cost_map[self.model]["output"]
+        
+        return input_cost + output_cost
+    
     def _get_language_name(self, language: str) -> str:
         """
         获取语言的完整名称
         
         Args:
             language: 语言代码
-            
+        
         Returns:
             语言的完整名称
         """
         if language in LANGUAGE_MAP and "openai" in LANGUAGE_MAP[language]:
             return LANGUAGE_MAP[language]["openai"]
         
-        # 常见语言的名称映射
-        language_names = {
-            "zh": "Chinese",
-            "en": "English",
-            "ja": "Japanese",
-            "ko": "Korean",
-            "es": "Spanish",
-            "fr": "French",
-            "de": "German",
-            "ru": "Russian",
-            "pt": "Portuguese",
-            "it": "Italian"
-        }
-        
-        return language_names.get(language, language) 
\ No newline at end of file
+        return LANGUAGE_NAMES.get(language, language) 
\ No newline at end of file
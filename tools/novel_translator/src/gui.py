@@ -6,6 +6,7 @@
 
 import os
 import sys
+import asyncio
 import threading
 import time
 import tkinter as tk
@@ -18,15 +19,26 @@ import queue
 
 # 导入翻译工具相关模块
 from .translator import NovelTranslator
+from .models import TranslationCancelled
 from .engines import list_engines
 from .output_formats import list_formats
 from .config import DEFAULT_CONFIG, LANGUAGE_MAP
-from .utils import detect_file_encoding, read_text_file
+from .utils import detect_encoding, read_text_lines
 from . import __version__
 
 # 创建消息队列，用于线程间通信
 message_queue = queue.Queue()
 
+# 日志区域最多保留的行数
+LOG_MAX_LINES = 1000
+
+# 下拉框选项，导入时计算一次
+_ENGINES = tuple(list_engines())
+_FORMATS = tuple(list_formats())
+_SOURCE_LANGS = ("auto", *LANGUAGE_MAP)
+_TARGET_LANGS = tuple(LANGUAGE_MAP)
+_CONTEXT_LEVELS = ("0 (无上下文)", "1 (段落级)", "2 (章节级)", "3 (全文级)")
+
 class TranslationProgress:
     """翻译进度类，用于在GUI和翻译线程之间共享进度信息"""
     def __init__(self):
@@ -34,8 +46,10 @@ class TranslationProgress:
         self.translated_paragraphs = 0
         self.current_paragraph = ""
         self.is_running = False
-        self.is_cancelled = False
-        self.is_paused = False
+        # 暂停与取消通过Event在线程间传递：pause_event置位表示正在运行
+        self.pause_event = threading.Event()
+        self.pause_event.set()
+        self.cancel_event = threading.Event()
         self.start_time = 0
         self.end_time = 0
         self.error = None
@@ -69,17 +83,32 @@ class NovelTranslatorGUI:
         self.document_title = tk.StringVar()
         self.budget_limit = tk.DoubleVar(value=0)
         
-        # 翻译进度和线程
+        # 翻译进度和任务
         self.progress = TranslationProgress()
-        self.translation_thread = None
+        self.translation_future = None
         self.progress_update_id = None
         
+        # 正在运行的翻译器，界面的暂停和取消状态通过它转达给翻译任务
+        self.translator = None
+        self._control_lock = threading.Lock()
+        
+        # 后台事件循环，翻译任务在其中调度，阻塞的翻译调用交给线程池执行
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
+        
+        # 翻译线程只保留最新一次的进度（赋值在CPython中是原子操作），
+        # 界面定时取样，避免每个段落都向队列推送一条消息
+        self._latest_progress = None
+        self._shown_progress = None
+        self._progress_shown_at = 0
+        
+        # 待写入日志区域的消息，在空闲时合并写入
+        self._log_buffer = []
+        self._log_flush_id = None
+        
         # 创建主框架
         self.create_main_frame()
         
-        # 开始GUI更新循环
-        self.update_from_queue()
-        
     def create_main_frame(self):
         """创建主框架"""
         # 创建主框架
@@ -119,26 +148,23 @@ class NovelTranslatorGUI:
         
         # 翻译引擎
         ttk.Label(settings_frame, text="翻译引擎:").grid(row=0, column=0, sticky=tk.W, padx=5, pady=5)
-        engines = list(list_engines().keys())
-        ttk.Combobox(settings_frame, textvariable=self.engine, values=engines, state="readonly").grid(row=0, column=1, sticky=tk.EW, padx=5, pady=5)
+        ttk.Combobox(settings_frame, textvariable=self.engine, values=_ENGINES, state="readonly").grid(row=0, column=1, sticky=tk.EW, padx=5, pady=5)
         
         # 源语言
         ttk.Label(settings_frame, text="源语言:").grid(row=0, column=2, sticky=tk.W, padx=5, pady=5)
-        languages = ["auto"] + list(LANGUAGE_MAP.keys())
-        ttk.Combobox(settings_frame, textvariable=self.source_lang, values=languages, state="readonly").grid(row=0, column=3, sticky=tk.EW, padx=5, pady=5)
+        ttk.Combobox(settings_frame, textvariable=self.source_lang, values=_SOURCE_LANGS, state="readonly").grid(row=0, column=3, sticky=tk.EW, padx=5, pady=5)
         
         # 目标语言
         ttk.Label(settings_frame, text="目标语言:").grid(row=1, column=0, sticky=tk.W, padx=5, pady=5)
-        ttk.Combobox(settings_frame, textvariable=self.target_lang, values=list(LANGUAGE_MAP.keys()), state="readonly").grid(row=1, column=1, sticky=tk.EW, padx=5, pady=5)
+        ttk.Combobox(settings_frame, textvariable=self.target_lang, values=_TARGET_LANGS, state="readonly").grid(row=1, column=1, sticky=tk.EW, padx=5, pady=5)
         
         # 输出格式
         ttk.Label(settings_frame, text="输出格式:").grid(row=1, column=2, sticky=tk.W, padx=5, pady=5)
-        formats = list(list_formats().keys())
-        ttk.Combobox(settings_frame, textvariable=self.output_format, values=formats, state="readonly").grid(row=1, column=3, sticky=tk.EW, padx=5, pady=5)
+        ttk.Combobox(settings_frame, textvariable=self.output_format, values=_FORMATS, state="readonly").grid(row=1, column=3, sticky=tk.EW, padx=5, pady=5)
         
         # 上下文级别
         ttk.Label(settings_frame, text="上下文级别:").grid(row=2, column=0, sticky=tk.W, padx=5, pady=5)
-        ttk.Combobox(settings_frame, textvariable=self.context_level, values=["0 (无上下文)", "1 (段落级)", "2 (章节级)", "3 (全文级)"], state="readonly").grid(row=2, column=1, sticky=tk.EW, padx=5, pady=5)
+        ttk.Combobox(settings_frame, textvariable=self.context_level, values=_CONTEXT_LEVELS, state="readonly").grid(row=2, column=1, sticky=tk.EW, padx=5, pady=5)
         
         # 预算限制
         ttk.Label(settings_frame, text="预算限制:").grid(row=2, column=2, sticky=tk.W, padx=5, pady=5)
@@ -245,17 +271,19 @@ class NovelTranslatorGUI:
         if os.path.exists(file_path) and os.path.isfile(file_path):
             try:
                 # 读取文件部分内容进行预览
-                encoding = detect_file_encoding(file_path)
-                preview_text = read_text_file(file_path, limit=10)
+                encoding = detect_encoding(file_path)
+                lines = read_text_lines(file_path, 10, encoding)
+                
+                # 先拼接全部预览内容，再一次性插入，避免逐行插入导致多次重排
+                preview = "".join(
+                    line[:100] + ('...\n\n' if len(line) > 100 else '\n\n')
+                    for line in lines if line.strip()
+                )
                 
                 # 更新预览区域
                 self.preview_text.config(state=tk.NORMAL)
                 self.preview_text.delete(1.0, tk.END)
-                self.preview_text.insert(tk.END, f"文件编码: {encoding}\n\n")
-                for line in preview_text:
-                    if line.strip():
-                        preview = line[:100] + ('...' if len(line) > 100 else '')
-                        self.preview_text.insert(tk.END, preview + "\n\n")
+                self.preview_text.insert(tk.END, f"文件编码: {encoding}\n\n{preview}")
                 self.preview_text.config(state=tk.DISABLED)
                 
                 # 记录日志
@@ -267,11 +295,25 @@ class NovelTranslatorGUI:
     
     def log(self, message, error=False):
         """添加日志"""
-        self.log_text.config(state=tk.NORMAL)
         if error:
-            self.log_text.insert(tk.END, f"[错误] {message}\n")
+            self._log_buffer.append(f"[错误] {message}\n")
         else:
-            self.log_text.insert(tk.END, f"[信息] {message}\n")
+            self._log_buffer.append(f"[信息] {message}\n")
+        
+        # 连续的多条日志在下一次空闲时合并写入
+        if self._log_flush_id is None:
+            self._log_flush_id = self.root.after_idle(self._flush_log)
+    
+    def _flush_log(self):
+        """将缓冲的日志一次性写入日志区域"""
+        self._log_flush_id = None
+        content = "".join(self._log_buffer)
+        self._log_buffer.clear()
+        
+        self.log_text.config(state=tk.NORMAL)
+        self.log_text.insert(tk.END, content)
+        # 只保留最近的日志，控制文本控件的行数
+        self.log_text.delete(1.0, f"end-{LOG_MAX_LINES + 1}l")
         self.log_text.see(tk.END)
         self.log_text.config(state=tk.DISABLED)
     
@@ -301,9 +343,12 @@ class NovelTranslatorGUI:
             return
         
         # 重置进度
+        self.translator = None
         self.progress = TranslationProgress()
         self.progress.is_running = True
         self.progress.start_time = time.time()
+        self._latest_progress = None
+        self._shown_progress = None
         
         # 更新UI状态
         self.start_button.config(state=tk.DISABLED)
@@ -332,13 +377,16 @@ class NovelTranslatorGUI:
         self.log("开始翻译任务")
         self.log(f"引擎: {params['engine_name']}, 源语言: {params['source_lang']}, 目标语言: {params['target_lang']}")
         
-        # 创建并启动翻译线程
-        self.translation_thread = threading.Thread(target=self.translation_worker, args=(params,))
-        self.translation_thread.daemon = True
-        self.translation_thread.start()
+        # 在后台事件循环中启动翻译任务
+        self.translation_future = asyncio.run_coroutine_threadsafe(self.run_translation(params), self.loop)
         
-        # 开始更新进度
-        self.update_progress()
+        # 启动GUI更新循环
+        if self.progress_update_id is None:
+            self.update_from_queue()
+    
+    async def run_translation(self, params):
+        """在后台事件循环中执行翻译任务"""
+        await self.loop.run_in_executor(None, self.translation_worker, params)
     
     def translation_worker(self, params):
         """翻译线程"""
@@ -356,25 +404,21 @@ class NovelTranslatorGUI:
                 "output_dir": params["output_dir"]
             })
             
-            # 创建翻译器
-            translator = NovelTranslator(config)
+            # 创建翻译器，信号处理器只能在主线程中注册，这里不注册
+            translator = NovelTranslator(config, handle_signals=False)
+            
+            # 应用创建翻译器之前已经发生的暂停或取消
+            self.translator = translator
+            self._sync_translator_controls()
             
-            # 自定义进度回调
+            # 自定义进度回调，在翻译的事件循环中调用，不能阻塞
             def progress_callback(current, total, text=""):
-                if self.progress.is_cancelled:
-                    return False  # 返回False停止翻译
-                
                 self.progress.total_paragraphs = total
                 self.progress.translated_paragraphs = current
                 self.progress.current_paragraph = text
-                
-                message_queue.put(("progress", {
-                    "current": current,
-                    "total": total,
-                    "text": text
-                }))
-                
-                return not self.progress.is_paused  # 如果暂停则返回False
+                # 在翻译线程中截取一次预览，界面刷新时直接使用
+                preview = text[:50] + ('...' if len(text) > 50 else '')
+                self._latest_progress = (current, total, preview)
             
             # 设置进度回调
             translator.set_progress_callback(progress_callback)
@@ -390,6 +434,10 @@ class NovelTranslatorGUI:
             self.progress.end_time = time.time()
             message_queue.put(("complete", {"output_file": output_file}))
             
+        except TranslationCancelled:
+            # 已发出的请求完成后翻译器保存进度并停止
+            message_queue.put(("cancelled", {}))
+            
         except Exception as e:
             # 错误
             self.progress.error = str(e)
@@ -397,33 +445,21 @@ class NovelTranslatorGUI:
     
     def update_from_queue(self):
         """从队列更新UI"""
+        # 进度只在与上次显示不同时更新，每次定时最多更新一次控件；
+        # 进度没有变化时每500毫秒刷新一次，使剩余时间持续更新
+        latest = self._latest_progress
+        now = time.time()
+        if self.progress.is_running and latest is not None and (
+                latest != self._shown_progress or now - self._progress_shown_at >= 0.5):
+            self._shown_progress = latest
+            self._progress_shown_at = now
+            self.show_progress(*latest)
+        
         try:
             while not message_queue.empty():
                 message_type, data = message_queue.get_nowait()
                 
-                if message_type == "progress":
-                    # 更新进度
-                    current = data["current"]
-                    total = data["total"]
-                    text = data["text"]
-                    
-                    # 更新进度条
-                    if total > 0:
-                        percent = int(current / total * 100)
-                        self.progress_bar["value"] = percent
-                        elapsed = time.time() - self.progress.start_time
-                        if current > 0:
-                            remaining = elapsed / current * (total - current)
-                            self.progress_info.config(text=f"进度: {current}/{total} ({percent}%) - 剩余时间: {int(remaining)}秒")
-                        else:
-                            self.progress_info.config(text=f"进度: {current}/{total} ({percent}%)")
-                    
-                    # 更新当前段落信息
-                    if text:
-                        preview = text[:50] + ('...' if len(text) > 50 else '')
-                        self.current_para_label.config(text=f"当前段落: {preview}")
-                    
-                elif message_type == "complete":
+                if message_type == "complete":
                     # 翻译完成
                     output_file = data["output_file"]
                     self.progress_bar["value"] = 100
@@ -444,6 +480,12 @@ class NovelTranslatorGUI:
                     # 提示用户
                     messagebox.showinfo("翻译完成", f"翻译任务已完成!\n输出文件: {output_file}")
                     
+                elif message_type == "cancelled":
+                    # 翻译任务已停止
+                    self.start_button.config(state=tk.NORMAL)
+                    self.log("翻译已取消，进度已保存")
+                    self.progress_info.config(text="翻译已取消")
+                    
                 elif message_type == "error":
                     # 翻译错误
                     error_message = data["message"]
@@ -461,44 +503,82 @@ class NovelTranslatorGUI:
         except queue.Empty:
             pass
         
-        # 继续队列检查
-        self.root.after(100, self.update_from_queue)
+        # 仅在翻译线程运行或仍有未处理消息时继续检查，空闲时不再定时唤醒
+        task_running = self.translation_future is not None and not self.translation_future.done()
+        if task_running or not message_queue.empty():
+            self.progress_update_id = self.root.after(100, self.update_from_queue)
+        else:
+            self.progress_update_id = None
     
-    def update_progress(self):
-        """更新进度显示"""
-        if self.progress.is_running:
-            # 更新进度显示，每100毫秒更新一次
-            self.root.after(100, self.update_progress)
+    def show_progress(self, current, total, preview):
+        """更新进度条和当前段落信息"""
+        # 更新进度条
+        if total > 0:
+            percent = int(current / total * 100)
+            self.progress_bar["value"] = percent
+            elapsed = time.time() - self.progress.start_time
+            if current > 0:
+                remaining = elapsed / current * (total - current)
+                self.progress_info.config(text=f"进度: {current}/{total} ({percent}%) - 剩余时间: {int(remaining)}秒")
+            else:
+                self.progress_info.config(text=f"进度: {current}/{total} ({percent}%)")
+        
+        # 更新当前段落信息
+        if preview:
+            self.current_para_label.config(text=f"当前段落: {preview}")
+    
+    def _sync_translator_controls(self):
+        """把界面的暂停和取消状态转达给翻译器，可在任意线程调用"""
+        with self._control_lock:
+            translator = self.translator
+            if translator is None:
+                return
+            if self.progress.cancel_event.is_set():
+                translator.cancel()
+            elif self.progress.pause_event.is_set():
+                translator.resume()
+            else:
+                translator.pause()
     
     def pause_translation(self):
         """暂停翻译"""
         if self.progress.is_running:
-            if self.progress.is_paused:
+            if not self.progress.pause_event.is_set():
                 # 恢复翻译
-                self.progress.is_paused = False
+                self.progress.pause_event.set()
                 self.pause_button.config(text="暂停")
                 self.log("翻译已恢复")
             else:
                 # 暂停翻译
-                self.progress.is_paused = True
+                self.progress.pause_event.clear()
                 self.pause_button.config(text="继续")
                 self.log("翻译已暂停")
+            self._sync_translator_controls()
     
     def cancel_translation(self):
         """取消翻译"""
         if self.progress.is_running:
-            if messagebox.askyesno("确认", "确定要取消翻译吗?"):
-                self.progress.is_cancelled = True
+            # 确认对话框是模态的，打开期间先暂停翻译线程
+            was_running = self.progress.pause_event.is_set()
+            self.progress.pause_event.clear()
+            self._sync_translator_controls()
+            if not messagebox.askyesno("确认", "确定要取消翻译吗?"):
+                if was_running:
+                    self.progress.pause_event.set()
+                self._sync_translator_controls()
+            else:
+                # 取消信号交给翻译器，正在进行的请求完成后翻译任务才会结束，
+                # 结束前不允许开始新的翻译
+                self.progress.cancel_event.set()
+                self._sync_translator_controls()
                 self.progress.is_running = False
                 
-                # 恢复UI状态
-                self.start_button.config(state=tk.NORMAL)
                 self.pause_button.config(state=tk.DISABLED)
                 self.cancel_button.config(state=tk.DISABLED)
                 
                 # 记录日志
-                self.log("翻译已取消")
-                self.progress_info.config(text="翻译已取消")
+                self.log("正在取消翻译...")
+                self.progress_info.config(text="正在取消...")
 
 def main():
     """主函数"""
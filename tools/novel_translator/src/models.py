@@ -5,15 +5,79 @@
 """
 
 from abc import ABC, abstractmethod
+from dataclasses import dataclass, field, fields
 from typing import List, Dict, Any, Optional, Union
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
+import asyncio
+import html
+import random
+import re
 import time
 from datetime import datetime
 import json
 import os
+import sys
+from operator import attrgetter
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from .cache import TranslationCache, MemoryCache
+
+# 可重试的HTTP状态码
+TRANSIENT_STATUS_CODES = (429, 500, 502, 503, 504)
+
+class TransientHTTPError(Exception):
+    """可重试的HTTP错误（限流或服务端暂时不可用）"""
+    
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class PermanentHTTPError(Exception):
+    """不可重试的HTTP错误"""
+    pass
+
+class TranslationCancelled(Exception):
+    """翻译被取消"""
+    pass
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    解析Retry-After响应头
+    
+    Args:
+        value: 响应头的值
+    
+    Returns:
+        等待秒数，无法解析时返回None
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+def _json_dumps(obj: Any) -> bytes:
+    """序列化为紧凑的UTF-8 JSON，安装了orjson时优先使用"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+# 进度日志文件相对进度文件的后缀
+PROGRESS_JOURNAL_SUFFIX = ".jsonl"
+
+# 默认批量翻译时段落之间的分隔标记，使用不常见的字符以免与正文冲突
+BATCH_SEPARATOR = "\u241E{}\u241E"
+BATCH_SEPARATOR_PATTERN = re.compile(r"\u241E(\d+)\u241E")
 
 # 数据模型定义
-class Paragraph(BaseModel):
+# 段落数量可达数万，使用带__slots__的数据类，省去pydantic逐字段校验和每个实例的__dict__
+@dataclass(slots=True)
+class Paragraph:
     """段落模型"""
     id: int
     content: str
@@ -24,19 +88,59 @@ class Paragraph(BaseModel):
     translation_time: float = 0
     tokens: int = 0
     attempts: int = 0
-    metadata: Dict[str, Any] = {}
+    metadata: Optional[Dict[str, Any]] = None  # 仅在需要时分配
+    _display: str = field(default="", init=False, repr=False, compare=False)  # __str__使用的截断内容
+    # 转义后的HTML文本，导出时按需生成，多个输出版本共用
+    _escaped_content: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    _escaped_translated: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    
+    def __post_init__(self) -> None:
+        self._display = self.content[:20] + ('...' if len(self.content) > 20 else '')
     
     def __str__(self) -> str:
-        return f"Paragraph({self.id}, {self.content[:20]}{'...' if len(self.content) > 20 else ''})"
+        return f"Paragraph({self.id}, {self._display})"
+    
+    @property
+    def escaped_content(self) -> str:
+        """HTML转义后的原文"""
+        if self._escaped_content is None:
+            self._escaped_content = html.escape(self.content, quote=False)
+        return self._escaped_content
+    
+    @property
+    def escaped_translated(self) -> str:
+        """HTML转义后的译文，未翻译时为空字符串"""
+        if not self.is_translated:
+            return ""
+        if self._escaped_translated is None:
+            self._escaped_translated = html.escape(self.translated, quote=False)
+        return self._escaped_translated
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为可序列化的字典，不包含内部缓存字段"""
+        return {name: getattr(self, name) for name in _PARAGRAPH_FIELDS}
+
+# 需要序列化的段落字段
+_PARAGRAPH_FIELDS = tuple(f.name for f in fields(Paragraph) if f.init)
 
-class Chapter(BaseModel):
+# 章节与段落一样使用带__slots__的数据类，导出时逐章读取字段
+@dataclass(slots=True)
+class Chapter:
     """章节模型"""
     id: int
     title: str
-    paragraphs: List[int] = []  # 段落ID列表
+    paragraphs: List[int] = field(default_factory=list)  # 段落ID列表
+    title_paragraph_id: Optional[int] = None  # 章节标题段落ID
     
     def __str__(self) -> str:
         return f"Chapter({self.id}, {self.title})"
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为可序列化的字典"""
+        return {name: getattr(self, name) for name in _CHAPTER_FIELDS}
+
+# 需要序列化的章节字段
+_CHAPTER_FIELDS = tuple(f.name for f in fields(Chapter))
 
 class Document(BaseModel):
     """文档模型"""
@@ -44,13 +148,32 @@ class Document(BaseModel):
     title: str
     source_language: str
     target_language: str
-    paragraphs: Dict[int, Paragraph] = {}
-    chapters: Dict[int, Chapter] = {}
+    paragraphs: Dict[int, Any] = {}  # 段落ID -> Paragraph，不经过pydantic校验
+    chapters: Dict[int, Any] = {}  # 章节ID -> Chapter，不经过pydantic校验
     metadata: Dict[str, Any] = {}
     
+    # 已翻译段落的累计统计，由mark_translated维护
+    _translated_count: int = PrivateAttr(default=0)
+    _total_tokens: int = PrivateAttr(default=0)
+    _total_time: float = PrivateAttr(default=0.0)
+    
+    # 原文总字符数和已翻译段落的原文字符数，估算成本时直接读取
+    _total_chars: int = PrivateAttr(default=0)
+    _translated_chars: int = PrivateAttr(default=0)
+    
+    # 尚未翻译的段落ID，按加入顺序保存，用字典的键充当有序集合
+    _untranslated_ids: Dict[int, None] = PrivateAttr(default_factory=dict)
+    
+    # 按ID排序的段落和章节，导出时多次使用，增加段落或章节时失效
+    _sorted_paragraphs: Optional[List[Paragraph]] = PrivateAttr(default=None)
+    _sorted_chapters: Optional[List[Chapter]] = PrivateAttr(default=None)
+    
     def add_paragraph(self, content: str, is_title: bool = False, chapter_id: Optional[int] = None) -> int:
         """添加段落"""
         para_id = len(self.paragraphs)
+        self._sorted_paragraphs = None
+        self._total_chars += len(content)
+        self._untranslated_ids[para_id] = None
         self.paragraphs[para_id] = Paragraph(
             id=para_id,
             content=content,
@@ -58,12 +181,16 @@ class Document(BaseModel):
             chapter=chapter_id
         )
         if chapter_id is not None and chapter_id in self.chapters:
-            self.chapters[chapter_id].paragraphs.append(para_id)
+            chapter = self.chapters[chapter_id]
+            chapter.paragraphs.append(para_id)
+            if is_title and chapter.title_paragraph_id is None:
+                chapter.title_paragraph_id = para_id
         return para_id
     
     def add_chapter(self, title: str) -> int:
         """添加章节"""
         chapter_id = len(self.chapters)
+        self._sorted_chapters = None
         self.chapters[chapter_id] = Chapter(
             id=chapter_id,
             title=title
@@ -72,51 +199,302 @@ class Document(BaseModel):
         para_id = self.add_paragraph(title, is_title=True, chapter_id=chapter_id)
         return chapter_id
     
+    @property
+    def sorted_paragraphs(self) -> List[Paragraph]:
+        """按ID排序的段落列表"""
+        if self._sorted_paragraphs is None or len(self._sorted_paragraphs) != len(self.paragraphs):
+            self._sorted_paragraphs = sorted(self.paragraphs.values(), key=attrgetter("id"))
+        return self._sorted_paragraphs
+    
+    @property
+    def sorted_chapters(self) -> List[Chapter]:
+        """按ID排序的章节列表"""
+        if self._sorted_chapters is None or len(self._sorted_chapters) != len(self.chapters):
+            self._sorted_chapters = sorted(self.chapters.values(), key=attrgetter("id"))
+        return self._sorted_chapters
+    
+    def mark_translated(self, para_id: int, translated: str, tokens: int = 0, seconds: float = 0) -> None:
+        """
+        标记段落已翻译，并同步更新文档的累计统计
+        
+        Args:
+            para_id: 段落ID
+            translated: 译文
+            tokens: 消耗的token数
+            seconds: 翻译耗时（秒）
+        """
+        para = self.paragraphs[para_id]
+        if para.is_translated:
+            # 重新翻译时先扣除旧的统计
+            self._translated_count -= 1
+            self._total_tokens -= para.tokens
+            self._total_time -= para.translation_time
+        else:
+            self._translated_chars += len(para.content)
+            self._untranslated_ids.pop(para_id, None)
+        para.translated = translated
+        para.is_translated = True
+        para._escaped_translated = None
+        para.tokens = tokens
+        para.translation_time = seconds
+        self._translated_count += 1
+        self._total_tokens += tokens
+        self._total_time += seconds
+    
+    def _recount(self) -> None:
+        """根据段落重新计算累计统计，用于加载进度后"""
+        self._translated_count = 0
+        self._total_tokens = 0
+        self._total_time = 0.0
+        self._total_chars = 0
+        self._translated_chars = 0
+        self._untranslated_ids = {}
+        for p in self.sorted_paragraphs:
+            self._total_chars += len(p.content)
+            if not p.is_translated:
+                self._untranslated_ids[p.id] = None
+            else:
+                self._translated_count += 1
+                self._translated_chars += len(p.content)
+                self._total_tokens += p.tokens
+                self._total_time += p.translation_time
+    
+    @property
+    def translated_count(self) -> int:
+        """已翻译段落数"""
+        return self._translated_count
+    
+    @property
+    def untranslated_ids(self) -> List[int]:
+        """尚未翻译的段落ID列表，按ID升序"""
+        return list(self._untranslated_ids)
+    
+    @property
+    def total_chars(self) -> int:
+        """原文总字符数"""
+        return self._total_chars
+    
+    @property
+    def pending_chars(self) -> int:
+        """尚未翻译段落的原文字符数"""
+        return self._total_chars - self._translated_chars
+    
     def get_progress(self) -> float:
         """获取翻译进度"""
         if not self.paragraphs:
             return 0.0
         
-        translated = sum(1 for p in self.paragraphs.values() if p.is_translated)
-        return translated / len(self.paragraphs) * 100
+        return self._translated_count / len(self.paragraphs) * 100
     
     def get_statistics(self) -> Dict[str, Any]:
         """获取统计数据"""
         total_paras = len(self.paragraphs)
-        translated_paras = sum(1 for p in self.paragraphs.values() if p.is_translated)
-        total_tokens = sum(p.tokens for p in self.paragraphs.values())
-        total_time = sum(p.translation_time for p in self.paragraphs.values())
+        translated_paras = self._translated_count
         
         return {
             "total_paragraphs": total_paras,
             "translated_paragraphs": translated_paras,
-            "progress": self.get_progress(),
-            "total_tokens": total_tokens,
-            "total_time": total_time,
-            "average_time_per_paragraph": total_time / translated_paras if translated_paras else 0,
+            "progress": translated_paras / total_paras * 100 if total_paras else 0.0,
+            "total_tokens": self._total_tokens,
+            "total_time": self._total_time,
+            "average_time_per_paragraph": self._total_time / translated_paras if translated_paras else 0,
             "timestamp": datetime.now().isoformat()
         }
     
     def save_progress(self, path: str) -> None:
-        """保存进度"""
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(self.dict(), f, ensure_ascii=False, indent=2)
+        """
+        保存进度
+        
+        段落逐个序列化并写入临时文件，不在内存中构建完整的文档字典。
+        写完后替换原文件，中途中断也不会留下不完整的进度文件。
+        """
+        header = _json_dumps(self.dict(exclude={"paragraphs", "chapters"}))
+        chapters = {chapter_id: chapter.to_dict() for chapter_id, chapter in self.chapters.items()}
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            # 去掉文档头部的结尾花括号，在其后追加章节和段落对象
+            f.write(header[:-1])
+            f.write(b',"chapters":')
+            f.write(_json_dumps(chapters))
+            f.write(b',"paragraphs":{')
+            for i, (para_id, para) in enumerate(self.paragraphs.items()):
+                if i:
+                    f.write(b',')
+                f.write(b'"%d":' % para_id)
+                f.write(_json_dumps(para.to_dict()))
+            f.write(b'}}')
+        os.replace(tmp_path, path)
+        
+        # 完整进度已包含日志中的译文
+        try:
+            os.remove(f"{path}{PROGRESS_JOURNAL_SUFFIX}")
+        except FileNotFoundError:
+            pass
+    
+    def append_progress(self, path: str, paragraphs: List[Paragraph]) -> None:
+        """
+        将新翻译的段落追加到进度日志
+        
+        日志与进度文件同名，每行记录一个段落的译文，只写入本次变化的段落。
+        加载进度时重放日志，下次保存完整进度后删除。
+        
+        Args:
+            path: 进度文件路径
+            paragraphs: 新翻译的段落
+        """
+        with open(f"{path}{PROGRESS_JOURNAL_SUFFIX}", 'ab') as f:
+            for para in paragraphs:
+                if para.is_translated:
+                    f.write(_json_dumps({
+                        "id": para.id,
+                        "translated": para.translated,
+                        "tokens": para.tokens,
+                        "translation_time": para.translation_time,
+                    }))
+                    f.write(b'\n')
     
     @classmethod
     def load_progress(cls, path: str) -> 'Document':
         """加载进度"""
         with open(path, 'r', encoding='utf-8') as f:
             data = json.load(f)
-        return cls(**data)
+        # 语言代码在导出时反复用作元数据和字典键，驻留后与代码中的字面量共用同一对象
+        for key in ("source_language", "target_language"):
+            if isinstance(data.get(key), str):
+                data[key] = sys.intern(data[key])
+        
+        # JSON对象的键为字符串，需要还原为章节ID和段落ID
+        data["chapters"] = {
+            int(chapter_id): Chapter(**chapter) for chapter_id, chapter in data.get("chapters", {}).items()
+        }
+        data["paragraphs"] = {
+            int(para_id): Paragraph(**para) for para_id, para in data.get("paragraphs", {}).items()
+        }
+        document = cls(**data)
+        document._recount()
+        
+        # 旧版本的进度文件没有记录章节标题段落
+        for para in document.paragraphs.values():
+            if para.is_title and para.chapter in document.chapters:
+                chapter = document.chapters[para.chapter]
+                if chapter.title_paragraph_id is None:
+                    chapter.title_paragraph_id = para.id
+        
+        # 重放上次完整保存之后追加的译文
+        journal_path = f"{path}{PROGRESS_JOURNAL_SUFFIX}"
+        if os.path.exists(journal_path):
+            with open(journal_path, 'rb') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        break  # 中断时最后一行可能不完整
+                    if entry["id"] in document.paragraphs:
+                        document.mark_translated(
+                            entry["id"], entry["translated"], entry.get("tokens", 0), entry.get("translation_time", 0)
+                        )
+        return document
 
 # 翻译引擎接口
 class TranslationEngine(ABC):
     """翻译引擎基类"""
     
+    # 引擎能否在译文中原样保留分隔标记，决定默认的batch_translate是否合并请求
+    supports_batch = True
+    
+    # estimate_cost返回值的货币单位
+    currency = "CNY"
+    
     def __init__(self, config: Dict[str, Any]):
         self.config = config
         self.source_language = config.get("source_language", "zh")
         self.target_language = config.get("target_language", "en")
+        self.parallel_requests = max(1, config.get("parallel_requests", 3))
+        self.batch_max_chars = config.get("batch_size", 1000)
+        
+        # 内存LRU缓存在前，持久化缓存在后，避免重复文本再次请求API
+        memory_cache_size = config.get("memory_cache_size", 4096)
+        self.memory_cache = MemoryCache(memory_cache_size) if memory_cache_size > 0 else None
+        self.cache = None
+        cache_dir = config.get("cache_dir", "")
+        if config.get("translation_cache", True) and cache_dir:
+            self.cache = TranslationCache(os.path.join(cache_dir, "translations.db"))
+    
+    def _cache_key(self, text: str) -> bytes:
+        """生成当前引擎、模型和语言方向下的缓存键"""
+        return TranslationCache.make_key(
+            type(self).__name__,
+            getattr(self, "model", ""),
+            self.source_language,
+            self.target_language,
+            text
+        )
+    
+    def get_cached(self, text: str) -> Optional[str]:
+        """
+        查询缓存的译文
+        
+        Args:
+            text: 待翻译文本
+        
+        Returns:
+            缓存的译文，未启用缓存或未命中时返回None
+        """
+        if self.memory_cache is None and self.cache is None:
+            return None
+        
+        key = self._cache_key(text)
+        if self.memory_cache is not None:
+            cached = self.memory_cache.get(key)
+            if cached is not None:
+                return cached
+        
+        if self.cache is None:
+            return None
+        cached = self.cache.get(key)
+        if cached is not None and self.memory_cache is not None:
+            self.memory_cache.set(key, cached)
+        return cached
+    
+    def uncached_texts(self, texts: List[str]) -> List[str]:
+        """
+        筛选出需要实际请求API的文本
+        
+        Args:
+            texts: 待翻译文本列表
+        
+        Returns:
+            未命中缓存的文本列表，重复文本只保留一份
+        """
+        unique_texts = list(dict.fromkeys(texts))
+        if self.memory_cache is None and self.cache is None:
+            return unique_texts
+        
+        # 先查内存缓存，剩余的文本在持久化缓存中批量查询，不逐条发出SQL查询
+        keys = {text: self._cache_key(text) for text in unique_texts}
+        if self.memory_cache is not None:
+            keys = {text: key for text, key in keys.items() if self.memory_cache.get(key) is None}
+        if self.cache is None or not keys:
+            return list(keys)
+        found = self.cache.get_many(list(keys.values()))
+        return [text for text, key in keys.items() if key not in found]
+    
+    def set_cached(self, text: str, translated: str) -> None:
+        """
+        缓存译文
+        
+        Args:
+            text: 原文
+            translated: 译文
+        """
+        if not translated or (self.memory_cache is None and self.cache is None):
+            return
+        
+        key = self._cache_key(text)
+        if self.memory_cache is not None:
+            self.memory_cache.set(key, translated)
+        if self.cache is not None:
+            self.cache.set(key, translated)
     
     @abstractmethod
     def translate(self, text: str) -> str:
@@ -125,34 +503,109 @@ class TranslationEngine(ABC):
         
         Args:
             text: 待翻译文本
-            
+        
         Returns:
             翻译后的文本
         """
         pass
     
-    @abstractmethod
     def batch_translate(self, texts: List[str]) -> List[str]:
         """
         批量翻译文本
         
+        默认将多个段落用分隔标记拼接后在一次请求中翻译，再按标记拆分译文；
+        引擎不支持保留标记（supports_batch为False）时逐段并发翻译。
+        
         Args:
             texts: 待翻译文本列表
-            
+        
         Returns:
             翻译后的文本列表
         """
-        pass
+        if not self.supports_batch or len(texts) <= 1:
+            return self.translate_concurrently(texts)
+        
+        # 按字符数将非空段落分组，每组拼接为一个请求
+        groups = []
+        current = []
+        current_chars = 0
+        for i, text in enumerate(texts):
+            if not text.strip():
+                continue
+            if current and current_chars + len(text) > self.batch_max_chars:
+                groups.append(current)
+                current = []
+                current_chars = 0
+            current.append(i)
+            current_chars += len(text)
+        if current:
+            groups.append(current)
+        
+        joined = [
+            "\n".join(f"{BATCH_SEPARATOR.format(n)}{texts[i]}" for n, i in enumerate(group, 1))
+            for group in groups
+        ]
+        
+        results = [""] * len(texts)
+        for group, translated in zip(groups, self.translate_concurrently(joined)):
+            parts = BATCH_SEPARATOR_PATTERN.split(translated)
+            numbers = [int(number) for number in parts[1::2]]
+            segments = dict(zip(numbers, (part.strip() for part in parts[2::2])))
+            if sorted(numbers) != list(range(1, len(group) + 1)):
+                # 分隔标记丢失、重复或错乱，回退为逐段翻译
+                segments = dict(enumerate(self.translate_concurrently([texts[i] for i in group]), 1))
+            for n, i in enumerate(group, 1):
+                results[i] = segments[n]
+        return results
+    
+    def translate_concurrently(self, texts: List[str]) -> List[str]:
+        """
+        并发翻译多个文本，同时进行的请求数不超过parallel_requests
+        
+        Args:
+            texts: 待翻译文本列表
+        
+        Returns:
+            翻译后的文本列表，顺序与输入一致
+        """
+        # 批次内重复的文本只翻译一次
+        unique_texts = list(dict.fromkeys(texts))
+        if len(unique_texts) < len(texts):
+            translated = dict(zip(unique_texts, self.translate_concurrently(unique_texts)))
+            return [translated[text] for text in texts]
+        
+        if len(texts) <= 1 or self.parallel_requests <= 1:
+            return [self.translate(text) for text in texts]
+        return asyncio.run(self._gather_bounded(self._translate_async, texts))
+    
+    async def _gather_bounded(self, func, items: List[Any]) -> List[Any]:
+        """在信号量限制下对每个元素并发执行异步函数func，结果顺序与输入一致"""
+        semaphore = asyncio.Semaphore(self.parallel_requests)
+        
+        async def run(item):
+            async with semaphore:
+                return await func(item)
+        
+        return list(await asyncio.gather(*(run(item) for item in items)))
     
-    def translate_with_retry(self, text: str, max_retries: int = 3, delay: float = 1.0) -> str:
+    async def _translate_async(self, text: str) -> str:
+        """异步翻译单个文本，默认在线程中执行同步的translate"""
+        return await asyncio.to_thread(self.translate, text)
+    
+    def translate_with_retry(self, text: str, max_retries: int = 3, delay: float = 1.0,
+                             max_delay: float = 30.0) -> str:
         """
         带重试的翻译
         
+        限流和服务端错误按带随机抖动的指数退避重试，服务端给出Retry-After时按其等待；
+        其余4xx错误不会重试。
+        
         Args:
             text: 待翻译文本
             max_retries: 最大重试次数
-            delay: 重试延迟(秒)
-            
+            delay: 首次重试的最大延迟(秒)
+            max_delay: 单次重试的最大延迟(秒)
+        
         Returns:
             翻译后的文本
         """
@@ -162,11 +615,27 @@ class TranslationEngine(ABC):
         while attempts < max_retries:
             try:
                 return self.translate(text)
+            except PermanentHTTPError:
+                raise
             except Exception as e:
                 attempts += 1
                 last_error = e
+                
+                # 兼容带response属性的HTTP异常（如requests.HTTPError）
+                retry_after = getattr(e, "retry_after", None)
+                response = getattr(e, "response", None)
+                status_code = getattr(response, "status_code", None)
+                if status_code is not None:
+                    if 400 <= status_code < 500 and status_code not in TRANSIENT_STATUS_CODES:
+                        raise
+                    if retry_after is None:
+                        retry_after = parse_retry_after(getattr(response, "headers", {}).get("Retry-After"))
+                
                 if attempts < max_retries:
-                    time.sleep(delay * attempts)  # 指数退避
+                    if retry_after is None:
+                        # 全抖动指数退避，避免并发请求同时重试
+                        retry_after = random.uniform(0, min(max_delay, delay * 2 ** (attempts - 1)))
+                    time.sleep(retry_after)
         
         # 达到最大重试次数后仍然失败
         raise Exception(f"翻译失败，已重试{max_retries}次: {last_error}")
@@ -179,4 +648,16 @@ class TranslationEngine(ABC):
     @abstractmethod
     def estimate_cost(self, text: str) -> float:
         """估算翻译成本"""
-        pass 
\ No newline at end of file
+        pass
+    
+    def estimate_cost_batch(self, texts: List[str]) -> float:
+        """
+        估算一组文本的总翻译成本
+        
+        Args:
+            texts: 待翻译文本列表
+        
+        Returns:
+            估算总成本，已缓存的文本不计入
+        """
+        return sum(self.estimate_cost(text) for text in self.uncached_texts(texts)) 
\ No newline at end of file
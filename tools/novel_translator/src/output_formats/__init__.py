@@ -4,7 +4,9 @@
 输出格式处理包
 """
 
-from typing import Dict, Any, Callable
+import functools
+from types import MappingProxyType
+from typing import Dict, Any, Callable, Mapping
 from ..models import Document
 
 # 输出格式处理函数类型
@@ -28,10 +30,10 @@ def get_formatter(format_name: str) -> OutputFormatterFn:
     
     Args:
         format_name: 格式名称
-        
+    
     Returns:
         格式处理函数
-        
+    
     Raises:
         ValueError: 不支持的格式
     """
@@ -40,11 +42,12 @@ def get_formatter(format_name: str) -> OutputFormatterFn:
     
     return FORMAT_REGISTRY[format_name]
 
-def list_formats() -> Dict[str, OutputFormatterFn]:
+@functools.cache
+def list_formats() -> Mapping[str, OutputFormatterFn]:
     """
     列出所有支持的输出格式
     
     Returns:
-        格式处理函数字典
+        格式处理函数的只读映射
     """
-    return FORMAT_REGISTRY
\ No newline at end of file
+    return MappingProxyType(FORMAT_REGISTRY)
\ No newline at end of file
@@ -8,53 +8,45 @@ import os
 from typing import Dict, Any, List
 from pathlib import Path
 import datetime
+from concurrent.futures import ThreadPoolExecutor
 
 from docx import Document as DocxDocument
 from docx.shared import Pt, RGBColor, Inches
 from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls
 
 from ..models import Document, Paragraph, Chapter
 from ..utils import ensure_dir
 
-def format_as_docx(document: Document, options: Dict[str, Any], output_path: str) -> str:
+def _create_docx(document: Document, author: str, language: str, info_items: List[str]) -> DocxDocument:
     """
-    将文档导出为DOCX格式
+    创建带标题和元信息的DOCX文档
     
     Args:
         document: 文档对象
-        options: 格式选项
-        output_path: 输出路径
-        
+        author: 作者
+        language: 文档语言
+        info_items: 元信息段落中的各项文本
+    
     Returns:
-        输出文件路径
+        DOCX文档
     """
-    # 解析选项
-    bilingual = options.get("bilingual_output", False)
-    include_titles = options.get("include_titles", True)
-    author = options.get("author", "Unknown")
-    
-    # 确保输出目录存在
-    output_dir = os.path.dirname(output_path)
-    ensure_dir(output_dir)
-    
-    # 创建DOCX文档
     docx = DocxDocument()
     
     # 设置文档属性
     docx.core_properties.title = document.title
     docx.core_properties.author = author
-    docx.core_properties.language = document.target_language if not bilingual else document.source_language
+    docx.core_properties.language = language
     
     # 添加标题
     title = docx.add_heading(document.title, level=0)
     title.alignment = WD_ALIGN_PARAGRAPH.CENTER
     
     # 添加元信息段落
-    today = datetime.datetime.now().strftime("%Y-%m-%d")
     info_para = docx.add_paragraph()
-    info_para.add_run(f"源语言: {document.source_language}").italic = True
-    info_para.add_run(f" | 目标语言: {document.target_language}").italic = True
-    info_para.add_run(f" | 生成日期: {today}").italic = True
+    for item in info_items:
+        info_para.add_run(item).italic = True
     docx.add_paragraph()  # 空行
     
     # 设置样式
@@ -62,76 +54,201 @@ def format_as_docx(document: Document, options: Dict[str, Any], output_path: str
     style.font.name = 'Times New Roman'
     style.font.size = Pt(12)
     
+    return docx
+
+# 译文标题的文字颜色
+_TITLE_COLOR = RGBColor(100, 100, 100)
+
+# 正文段落和译文段落（引用样式、灰色斜体）的XML模板，填入已转义的文本
+_PARAGRAPH_XML = '<w:p><w:r><w:t xml:space="preserve">%s</w:t></w:r></w:p>'
+_TRANSLATION_XML = (
+    '<w:p><w:pPr><w:pStyle w:val="Quote"/></w:pPr>'
+    '<w:r><w:rPr><w:i/><w:color w:val="505050"/></w:rPr><w:t xml:space="preserve">%s</w:t></w:r></w:p>'
+)
+_PAGE_BREAK_XML = '<w:p><w:r><w:br w:type="page"/></w:r></w:p>'
+_BODY_XML = f'<w:body {nsdecls("w")}>%s</w:body>'
+
+def _run_text(escaped: str) -> str:
+    """将制表符和换行转换为对应的XML元素，与python-docx设置run.text的行为一致"""
+    if "\t" in escaped or "\n" in escaped:
+        escaped = (escaped
+                   .replace("\t", '</w:t><w:tab/><w:t xml:space="preserve">')
+                   .replace("\n", '</w:t><w:br/><w:t xml:space="preserve">'))
+    return escaped
+
+class _BodyWriter:
+    """
+    批量向DOCX正文追加段落
+    
+    正文、译文段落和分页符先以XML文本缓存，在添加标题或保存前一次解析并插入正文，
+    不为每个段落创建python-docx的段落和文本块对象。
+    """
+    
+    def __init__(self, docx: DocxDocument):
+        self.docx = docx
+        self._parts = []
+    
+    def add_paragraph(self, escaped: str) -> None:
+        """添加正文段落，文本需已转义"""
+        self._parts.append(_PARAGRAPH_XML % _run_text(escaped))
+    
+    def add_translation(self, escaped: str) -> None:
+        """添加译文段落，文本需已转义"""
+        self._parts.append(_TRANSLATION_XML % _run_text(escaped))
+    
+    def flush(self) -> None:
+        """将缓存的段落插入正文末尾（节属性之前）"""
+        if not self._parts:
+            return
+        container = parse_xml(_BODY_XML % "".join(self._parts))
+        self._parts.clear()
+        
+        body = self.docx.element.body
+        sect_pr = body.sectPr
+        for p in list(container):
+            if sect_pr is not None:
+                sect_pr.addprevious(p)
+            else:
+                body.append(p)
+    
+    def add_heading(self, text: str, level: int):
+        """添加居中的标题"""
+        self.flush()
+        heading = self.docx.add_heading(text, level=level)
+        heading.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        return heading
+    
+    def add_page_break(self) -> None:
+        """添加分页符"""
+        self._parts.append(_PAGE_BREAK_XML)
+    
+    def save(self, path: str) -> None:
+        """保存文档"""
+        self.flush()
+        self.docx.save(path)
+
+def format_as_docx(document: Document, options: Dict[str, Any], output_path: str) -> str:
+    """
+    将文档导出为DOCX格式
+    
+    Args:
+        document: 文档对象
+        options: 格式选项
+        output_path: 输出路径
+    
+    Returns:
+        输出文件路径
+    """
+    # 解析选项
+    bilingual = options.get("bilingual_output", False)
+    include_titles = options.get("include_titles", True)
+    author = options.get("author", "Unknown")
+    
+    # 确保输出目录存在
+    output_dir = os.path.dirname(output_path)
+    ensure_dir(output_dir)
+    
+    # 创建DOCX文档
+    today = datetime.datetime.now().strftime("%Y-%m-%d")
+    docx = _create_docx(
+        document,
+        author,
+        document.target_language if not bilingual else document.source_language,
+        [f"源语言: {document.source_language}", f" | 目标语言: {document.target_language}", f" | 生成日期: {today}"]
+    )
+    
+    body = _BodyWriter(docx)
+    
+    # 双语模式下同时构建两个单语言版本，只遍历一次文档
+    if bilingual:
+        source_body = _BodyWriter(_create_docx(document, author, document.source_language,
+                                               [f"语言: {document.source_language}", f" | 生成日期: {today}"]))
+        target_body = _BodyWriter(_create_docx(document, author, document.target_language,
+                                               [f"语言: {document.target_language}", f" | 生成日期: {today}"]))
+    
+    # 循环中反复按ID查找段落，预先取出查找方法
+    paras_get = document.paragraphs.get
+    
     # 按章节添加内容
     if document.chapters:
         # 有章节结构的情况
-        for chapter_id, chapter in sorted(document.chapters.items(), key=lambda x: x[0]):
+        for chapter in document.sorted_chapters:
             # 添加章节标题
-            heading = docx.add_heading(chapter.title, level=1)
-            heading.alignment = WD_ALIGN_PARAGRAPH.CENTER
+            body.add_heading(chapter.title, level=1)
             
             # 章节标题段落
-            title_para = None
-            for para_id in chapter.paragraphs:
-                para = document.paragraphs.get(para_id)
-                if para and para.is_title:
-                    title_para = para
-                    break
+            title_para = paras_get(chapter.title_paragraph_id)
             
             # 如果找到标题段落且为双语模式，添加译文标题
             if title_para and bilingual and title_para.is_translated:
-                translated_heading = docx.add_heading(title_para.translated, level=2)
-                translated_heading.alignment = WD_ALIGN_PARAGRAPH.CENTER
+                translated_heading = body.add_heading(title_para.translated, level=2)
                 
                 # 设置标题样式为斜体
                 for run in translated_heading.runs:
                     run.italic = True
-                    run.font.color.rgb = RGBColor(100, 100, 100)
+                    run.font.color.rgb = _TITLE_COLOR
             
-            # 添加章节内容段落
-            for para_id in chapter.paragraphs:
-                para = document.paragraphs.get(para_id)
-                if para and not para.is_title:  # 跳过标题段落，已单独处理
-                    # 添加原文
-                    p = docx.add_paragraph(para.content)
-                    
-                    # 如果是双语模式，添加译文
-                    if bilingual and para.is_translated:
-                        trans_p = docx.add_paragraph(para.translated)
-                        trans_p.style = 'Quote'
-                        for run in trans_p.runs:
-                            run.italic = True
-                            run.font.color.rgb = RGBColor(80, 80, 80)
+            # 单语言版本使用标题段落作为章节标题
+            if title_para and bilingual:
+                source_body.add_heading(title_para.content, level=1)
+                target_title = title_para.translated if title_para.is_translated else title_para.content
+                target_body.add_heading(target_title, level=1)
+            
+            # 添加章节内容段落，跳过标题段落（已单独处理）
+            paras = [para for para in map(paras_get, chapter.paragraphs) if para and not para.is_title]
+            if bilingual:
+                for para in paras:
+                    # 添加原文和译文
+                    body.add_paragraph(para.escaped_content)
+                    source_body.add_paragraph(para.escaped_content)
+                    if para.is_translated:
+                        body.add_translation(para.escaped_translated)
+                        target_body.add_paragraph(para.escaped_translated)
+                    else:
+                        target_body.add_paragraph(para.escaped_content)
+            else:
+                for para in paras:
+                    body.add_paragraph(para.escaped_content)
             
             # 每章结束添加分页符
-            docx.add_page_break()
+            body.add_page_break()
+            if bilingual:
+                source_body.add_page_break()
+                target_body.add_page_break()
     else:
-        # 无章节结构，将所有内容作为普通段落添加
-        for para_id, para in sorted(document.paragraphs.items(), key=lambda x: x[0]):
-            if not para.is_title or include_titles:
-                # 添加原文
-                p = docx.add_paragraph(para.content)
-                
-                # 如果是双语模式，添加译文
-                if bilingual and para.is_translated:
-                    trans_p = docx.add_paragraph(para.translated)
-                    trans_p.style = 'Quote'
-                    for run in trans_p.runs:
-                        run.italic = True
-                        run.font.color.rgb = RGBColor(80, 80, 80)
+        # 无章节结构，将所有内容作为普通段落添加，标题段落的筛选在循环外完成一次
+        paras = document.sorted_paragraphs
+        if not include_titles:
+            paras = [para for para in paras if not para.is_title]
+        
+        if bilingual:
+            for para in paras:
+                # 添加原文和译文
+                body.add_paragraph(para.escaped_content)
+                source_body.add_paragraph(para.escaped_content)
+                if para.is_translated:
+                    body.add_translation(para.escaped_translated)
+                    target_body.add_paragraph(para.escaped_translated)
+                else:
+                    target_body.add_paragraph(para.escaped_content)
+        else:
+            for para in paras:
+                body.add_paragraph(para.escaped_content)
     
     # 保存文档
-    docx.save(output_path)
-    
-    # 如果是双语模式，再生成两个单语言的版本
     if bilingual:
-        # 源语言版本
-        source_path = f"{os.path.splitext(output_path)[0]}_source.docx"
-        format_single_language_docx(document, False, options, source_path)
-        
-        # 目标语言版本
-        target_path = f"{os.path.splitext(output_path)[0]}_target.docx"
-        format_single_language_docx(document, True, options, target_path)
+        # 三个版本互不依赖，并行保存；ZIP压缩和文件写入期间会释放GIL
+        stem = os.path.splitext(output_path)[0]
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            futures = [
+                executor.submit(body.save, output_path),
+                executor.submit(source_body.save, f"{stem}_source.docx"),
+                executor.submit(target_body.save, f"{stem}_target.docx"),
+            ]
+            for future in futures:
+                future.result()
+    else:
+        body.save(output_path)
     
     return output_path
 
@@ -144,7 +261,7 @@ def format_single_language_docx(document: Document, target_language: bool, optio
         target_language: 是否为目标语言
         options: 格式选项
         output_path: 输出路径
-        
+    
     Returns:
         输出文件路径
     """
@@ -157,67 +274,43 @@ def format_single_language_docx(document: Document, target_language: bool, optio
     author = options.get("author", "Unknown")
     
     # 创建DOCX文档
-    docx = DocxDocument()
-    
-    # 设置文档属性
-    docx.core_properties.title = document.title
-    docx.core_properties.author = author
-    docx.core_properties.language = document.target_language if target_language else document.source_language
-    
-    # 添加标题
-    title = docx.add_heading(document.title, level=0)
-    title.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    
-    # 添加元信息段落
     today = datetime.datetime.now().strftime("%Y-%m-%d")
     lang = document.target_language if target_language else document.source_language
-    info_para = docx.add_paragraph()
-    info_para.add_run(f"语言: {lang}").italic = True
-    info_para.add_run(f" | 生成日期: {today}").italic = True
-    docx.add_paragraph()  # 空行
+    body = _BodyWriter(_create_docx(document, author, lang, [f"语言: {lang}", f" | 生成日期: {today}"]))
     
-    # 设置样式
-    style = docx.styles['Normal']
-    style.font.name = 'Times New Roman'
-    style.font.size = Pt(12)
+    # 循环中反复按ID查找段落，预先取出查找方法
+    paras_get = document.paragraphs.get
     
     # 按章节添加内容
     if document.chapters:
         # 有章节结构的情况
-        for chapter_id, chapter in sorted(document.chapters.items(), key=lambda x: x[0]):
+        for chapter in document.sorted_chapters:
             # 获取章节标题段落
-            title_para = None
-            for para_id in chapter.paragraphs:
-                para = document.paragraphs.get(para_id)
-                if para and para.is_title:
-                    title_para = para
-                    break
+            title_para = paras_get(chapter.title_paragraph_id)
             
             # 添加章节标题
             if title_para:
                 title_text = title_para.translated if target_language and title_para.is_translated else title_para.content
-                heading = docx.add_heading(title_text, level=1)
-                heading.alignment = WD_ALIGN_PARAGRAPH.CENTER
+                body.add_heading(title_text, level=1)
             
             # 添加章节内容段落
-            for para_id in chapter.paragraphs:
-                para = document.paragraphs.get(para_id)
+            for para in map(paras_get, chapter.paragraphs):
                 if para and not para.is_title:  # 跳过标题段落，已单独处理
                     # 根据语言选择内容
-                    content = para.translated if target_language and para.is_translated else para.content
-                    p = docx.add_paragraph(content)
+                    content = para.escaped_translated if target_language and para.is_translated else para.escaped_content
+                    body.add_paragraph(content)
             
             # 每章结束添加分页符
-            docx.add_page_break()
+            body.add_page_break()
     else:
         # 无章节结构，将所有内容作为普通段落添加
-        for para_id, para in sorted(document.paragraphs.items(), key=lambda x: x[0]):
+        for para in document.sorted_paragraphs:
             if not para.is_title or include_titles:
                 # 根据语言选择内容
-                content = para.translated if target_language and para.is_translated else para.content
-                p = docx.add_paragraph(content)
+                content = para.escaped_translated if target_language and para.is_translated else para.escaped_content
+                body.add_paragraph(content)
     
     # 保存文档
-    docx.save(output_path)
+    body.save(output_path)
     
     return output_path 
\ No newline at end of file
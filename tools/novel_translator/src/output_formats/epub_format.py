@@ -5,10 +5,17 @@ EPUB格式输出
 """
 
 import os
-from typing import Dict, Any, List
+import functools
+import hashlib
+import html
+from typing import Dict, Any, List, Optional, Tuple, Callable, Iterable, Iterator
+from itertools import chain
 from pathlib import Path
 import uuid
+import tempfile
+import threading
 import datetime
+from concurrent.futures import ThreadPoolExecutor
 
 import ebooklib
 from ebooklib import epub
@@ -16,29 +23,64 @@ from ebooklib import epub
 from ..models import Document, Paragraph, Chapter
 from ..utils import ensure_dir
 
-def format_as_epub(document: Document, options: Dict[str, Any], output_path: str) -> str:
+# 默认的ZIP压缩级别，文本为主的电子书用较低级别可明显减少压缩耗时，文件只略大一些
+EPUB_COMPRESS_LEVEL = 3
+
+# 页面内容超过该大小后由内存转存到磁盘临时文件
+SPOOL_MAX_SIZE = 1 << 20
+
+# 段落HTML模板，绑定的格式化方法在导入时生成一次，循环中直接调用
+_P_HTML = "<p>%s</p>".__mod__
+_TRANSLATION_HTML = "<p class='translation'>%s</p>".__mod__
+
+def _source_text(para: Paragraph) -> str:
+    """段落原文的HTML文本"""
+    return para.escaped_content
+
+def _target_text(para: Paragraph) -> str:
+    """段落译文的HTML文本，未翻译时使用原文"""
+    return para.escaped_translated if para.is_translated else para.escaped_content
+
+def _paragraphs_html(paras: List[Paragraph], content_selector: Callable[[Paragraph], str],
+                     emit_translation: bool) -> Iterator[str]:
     """
-    将文档导出为EPUB格式
+    逐段生成正文HTML片段，供str.join直接消费
     
     Args:
-        document: 文档对象
-        options: 格式选项
-        output_path: 输出路径
-        
+        paras: 段落列表
+        content_selector: 返回段落正文HTML文本（已转义）的函数
+        emit_translation: 是否在已翻译段落的正文后附加译文
+    
     Returns:
-        输出文件路径
+        HTML片段迭代器
     """
-    # 解析选项
-    bilingual = options.get("bilingual_output", False)
-    include_titles = options.get("include_titles", True)
-    author = options.get("author", "Unknown")
-    language = options.get("language", document.target_language if not bilingual else document.source_language)
-    css_style = options.get("css_style", DEFAULT_CSS)
+    if not emit_translation:
+        return map(_P_HTML, map(content_selector, paras))
+    return chain.from_iterable(
+        (_P_HTML(content_selector(para)), _TRANSLATION_HTML(para.escaped_translated))
+        if para.is_translated else (_P_HTML(content_selector(para)),)
+        for para in paras
+    )
+
+def _join_html(head: Iterable[str], body: Iterator[str]) -> str:
+    """拼接页面开头的标题和正文片段"""
+    return "\n".join(chain(head, body))
+
+def _create_book(document: Document, author: str, language: str, css_style: str,
+                 today: str) -> Tuple[epub.EpubBook, List[epub.EpubHtml]]:
+    """
+    创建带样式、封面和简介页的EPUB书籍
     
-    # 确保输出目录存在
-    output_dir = os.path.dirname(output_path)
-    ensure_dir(output_dir)
+    Args:
+        document: 文档对象
+        author: 作者
+        language: 书籍语言
+        css_style: 正文CSS样式
+        today: 简介页中显示的生成日期
     
+    Returns:
+        (EPUB书籍, 已添加的页面列表)
+    """
     # 创建EPUB书籍
     book = epub.EpubBook()
     
@@ -67,7 +109,6 @@ def format_as_epub(document: Document, options: Dict[str, Any], output_path: str
     
     # 章节列表
     chapters = []
-    toc = []
     
     # 创建封面页
     cover = epub.EpubHtml(
@@ -79,13 +120,13 @@ def format_as_epub(document: Document, options: Dict[str, Any], output_path: str
     cover_content = f"""
     <html>
     <head>
-        <title>{document.title}</title>
+        <title>{html.escape(document.title, quote=False)}</title>
         <link rel="stylesheet" href="style/main.css" type="text/css" />
     </head>
     <body>
         <div class="cover">
-            <h1>{document.title}</h1>
-            <p class="author">{author}</p>
+            <h1>{html.escape(document.title, quote=False)}</h1>
+            <p class="author">{html.escape(author, quote=False)}</p>
         </div>
     </body>
     </html>
@@ -102,8 +143,6 @@ def format_as_epub(document: Document, options: Dict[str, Any], output_path: str
         lang=language
     )
     
-    today = datetime.datetime.now().strftime("%Y-%m-%d")
-    
     intro_content = f"""
     <html>
     <head>
@@ -124,49 +163,95 @@ def format_as_epub(document: Document, options: Dict[str, Any], output_path: str
     book.add_item(intro)
     chapters.append(intro)
     
-    # 按章节添加内容
-    if document.chapters:
-        # 有章节结构的情况
-        for chapter_id, chapter in sorted(document.chapters.items(), key=lambda x: x[0]):
-            # 创建章节
-            epub_chapter = create_chapter_html(document, chapter, bilingual, language, main_css)
-            book.add_item(epub_chapter)
-            chapters.append(epub_chapter)
-            toc.append(epub.Link(epub_chapter.file_name, chapter.title, chapter.title))
-    else:
-        # 无章节结构，将所有内容作为一个章节
-        all_content = epub.EpubHtml(
-            title="全文",
-            file_name="content.xhtml",
-            lang=language
-        )
-        
-        content_html = "<h1>全文</h1>\n"
-        
-        # 按顺序处理每个段落
-        for para_id, para in sorted(document.paragraphs.items(), key=lambda x: x[0]):
-            if not para.is_title or include_titles:
-                content_html += f"<p>{para.content}</p>\n"
-                
-                if bilingual and para.is_translated:
-                    content_html += f"<p class='translation'>{para.translated}</p>\n"
-        
-        all_content.content = f"""
-        <html>
-        <head>
-            <title>全文</title>
-            <link rel="stylesheet" href="style/main.css" type="text/css" />
-        </head>
-        <body>
-            {content_html}
-        </body>
-        </html>
-        """
-        
-        book.add_item(all_content)
-        chapters.append(all_content)
-        toc.append(epub.Link(all_content.file_name, "全文", "content"))
+    return book, chapters
+
+class _PageSpool:
+    """
+    页面内容的共享临时文件
+    
+    双语模式下三个版本并行写出，读写都在锁内完成，避免seek和read之间被其他线程打断。
+    """
+    
+    def __init__(self):
+        self._file = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        self._lock = threading.Lock()
+    
+    def append(self, data: bytes) -> int:
+        """追加内容，返回其起始偏移"""
+        with self._lock:
+            self._file.seek(0, os.SEEK_END)
+            offset = self._file.tell()
+            self._file.write(data)
+        return offset
+    
+    def read(self, offset: int, length: int) -> bytes:
+        """读取指定位置的内容"""
+        with self._lock:
+            self._file.seek(offset)
+            return self._file.read(length)
+    
+    def close(self) -> None:
+        self._file.close()
+
+class _SpooledHtml(epub.EpubHtml):
+    """内容保存在临时文件中的页面，写出EPUB时才读回内存"""
+    
+    def __init__(self, spool: _PageSpool, *args, **kwargs):
+        self._spool = spool
+        self._offset = 0
+        self._length = 0
+        super().__init__(*args, **kwargs)
+    
+    @property
+    def content(self) -> bytes:
+        return self._spool.read(self._offset, self._length)
+    
+    @content.setter
+    def content(self, value) -> None:
+        if isinstance(value, str):
+            value = value.encode("utf-8")
+        self._offset = self._spool.append(value)
+        self._length = len(value)
+
+def _create_page(title: str, file_name: str, language: str, content_html: str,
+                 spool: Optional[_PageSpool] = None) -> epub.EpubHtml:
+    """
+    创建内容页
+    
+    Args:
+        title: 页面标题
+        file_name: 文件名
+        language: 语言
+        content_html: 页面正文HTML
+        spool: 保存页面内容的临时文件，为None时内容保存在内存中
+    
+    Returns:
+        页面对象
+    """
+    page_class = epub.EpubHtml if spool is None else functools.partial(_SpooledHtml, spool)
+    page = page_class(
+        title=title,
+        file_name=file_name,
+        lang=language
+    )
     
+    page.content = f"""
+    <html>
+    <head>
+        <title>{html.escape(title, quote=False)}</title>
+        <link rel="stylesheet" href="style/main.css" type="text/css" />
+    </head>
+    <body>
+        {content_html}
+    </body>
+    </html>
+    """
+    
+    return page
+
+def _write_book(book: epub.EpubBook, chapters: List[epub.EpubHtml], toc: List[epub.Link], output_path: str,
+                compress_level: int = EPUB_COMPRESS_LEVEL) -> None:
+    """添加目录、spine和导航文件后写出EPUB书籍"""
     # 添加目录
     book.toc = toc
     
@@ -178,88 +263,236 @@ def format_as_epub(document: Document, options: Dict[str, Any], output_path: str
     book.add_item(epub.EpubNav())
     
     # 写入文件
-    epub.write_epub(output_path, book, {})
+    epub.write_epub(output_path, book, {"compresslevel": compress_level})
+
+def _variants_hash(document: Document, author: str, css_style: str, include_titles: bool,
+                   compress_level: int, today: str) -> str:
+    """
+    计算决定单语言版本内容的文档信息和选项的哈希
+    
+    Args:
+        document: 文档对象
+        author: 作者
+        css_style: 正文CSS样式
+        include_titles: 是否包含标题段落
+        compress_level: ZIP压缩级别
+        today: 简介页中显示的生成日期
+    
+    Returns:
+        十六进制哈希字符串
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr((document.title, document.source_language, document.target_language,
+                   author, css_style, include_titles, compress_level, today)).encode("utf-8"))
+    for chapter in document.sorted_chapters:
+        h.update(repr((chapter.id, chapter.title, chapter.title_paragraph_id, chapter.paragraphs)).encode("utf-8"))
+    for para in document.sorted_paragraphs:
+        h.update(repr((para.id, para.content, para.translated, para.is_translated, para.is_title)).encode("utf-8"))
+    return h.hexdigest()
+
+def _is_up_to_date(hash_path: str, digest: str, paths: Tuple[str, ...]) -> bool:
+    """记录的哈希与当前一致且输出文件都存在时返回True"""
+    if not all(os.path.exists(path) for path in paths):
+        return False
+    try:
+        with open(hash_path, "r", encoding="utf-8") as f:
+            return f.read().strip() == digest
+    except OSError:
+        return False
+
+def format_as_epub(document: Document, options: Dict[str, Any], output_path: str,
+                   content_selector: Callable[[Paragraph], str] = _source_text,
+                   emit_translation: Optional[bool] = None) -> str:
+    """
+    将文档导出为EPUB格式
+    
+    Args:
+        document: 文档对象
+        options: 格式选项
+        output_path: 输出路径
+        content_selector: 返回段落正文HTML文本（已转义）的函数，默认使用原文
+        emit_translation: 是否在正文后附加译文，默认与双语选项一致
     
-    # 如果是双语模式，再生成两个单语言的版本
+    Returns:
+        输出文件路径
+    """
+    # 解析选项
+    bilingual = options.get("bilingual_output", False)
+    include_titles = options.get("include_titles", True)
+    author = options.get("author", "Unknown")
+    language = options.get("language", document.target_language if not bilingual else document.source_language)
+    css_style = options.get("css_style", DEFAULT_CSS)
+    compress_level = options.get("compress_level", EPUB_COMPRESS_LEVEL)
+    if emit_translation is None:
+        emit_translation = bilingual
+    
+    # 确保输出目录存在
+    output_dir = os.path.dirname(output_path)
+    ensure_dir(output_dir)
+    
+    # 双语模式下的两个单语言版本内容未变化时跳过重新生成，哈希记录在输出文件旁
+    stem = os.path.splitext(output_path)[0]
+    variant_paths = (f"{stem}_source.epub", f"{stem}_target.epub")
+    hash_path = output_path + ".hash"
+    
+    # 双语模式下三个版本共用同一个生成日期；日期也计入哈希，跨天后单语言版本会随之更新
+    today = datetime.datetime.now().strftime("%Y-%m-%d")
+    variants = False
     if bilingual:
-        # 源语言版本
-        source_path = f"{os.path.splitext(output_path)[0]}_source.epub"
-        options_source = dict(options)
-        options_source["bilingual_output"] = False
-        options_source["language"] = document.source_language
-        format_single_language_epub(document, False, options_source, source_path)
+        digest = _variants_hash(document, author, css_style, include_titles, compress_level, today)
+        variants = not _is_up_to_date(hash_path, digest, variant_paths)
+    
+    # 页面正文暂存在临时文件中，不在内存中保留整本书的HTML，写出EPUB时逐页读回
+    spool = _PageSpool()
+    try:
+        # 创建EPUB书籍
+        book, chapters = _create_book(document, author, language, css_style, today)
+        toc = []
         
-        # 目标语言版本
-        target_path = f"{os.path.splitext(output_path)[0]}_target.epub"
-        options_target = dict(options)
-        options_target["bilingual_output"] = False
-        options_target["language"] = document.target_language
-        format_single_language_epub(document, True, options_target, target_path)
+        # 双语模式下同时构建两个单语言版本，只遍历一次文档
+        if variants:
+            source_language = document.source_language
+            target_language = document.target_language
+            source_book, source_chapters = _create_book(document, author, source_language, css_style, today)
+            target_book, target_chapters = _create_book(document, author, target_language, css_style, today)
+        
+        # 按章节添加内容
+        if document.chapters:
+            # 有章节结构的情况
+            for chapter in document.sorted_chapters:
+                # 创建章节
+                file_name = f"chapter_{chapter.id}.xhtml"
+                content_html, source_html, target_html = _chapter_bodies(
+                    document, chapter, variants, content_selector, emit_translation
+                )
+                epub_chapter = _create_page(chapter.title, file_name, language, content_html, spool)
+                book.add_item(epub_chapter)
+                chapters.append(epub_chapter)
+                toc.append(epub.Link(file_name, chapter.title, chapter.title))
+                
+                if variants:
+                    source_chapter = _create_page(chapter.title, file_name, source_language, source_html, spool)
+                    source_book.add_item(source_chapter)
+                    source_chapters.append(source_chapter)
+                    target_chapter = _create_page(chapter.title, file_name, target_language, target_html, spool)
+                    target_book.add_item(target_chapter)
+                    target_chapters.append(target_chapter)
+        else:
+            # 无章节结构，将所有内容作为一个章节
+            # 标题段落的筛选在循环外完成一次
+            paras = document.sorted_paragraphs
+            if not include_titles:
+                paras = [para for para in paras if not para.is_title]
+            
+            # 各段HTML由生成器产出，直接交给join统一拼接
+            heading = ("<h1>全文</h1>",)
+            all_content = _create_page("全文", "content.xhtml", language,
+                                       _join_html(heading, _paragraphs_html(paras, content_selector, emit_translation)),
+                                       spool)
+            book.add_item(all_content)
+            chapters.append(all_content)
+            toc.append(epub.Link(all_content.file_name, "全文", "content"))
+            
+            if variants:
+                source_content = _create_page("全文", "content.xhtml", source_language,
+                                              _join_html(heading, map(_P_HTML, map(_source_text, paras))), spool)
+                source_book.add_item(source_content)
+                source_chapters.append(source_content)
+                target_content = _create_page("全文", "content.xhtml", target_language,
+                                              _join_html(heading, map(_P_HTML, map(_target_text, paras))), spool)
+                target_book.add_item(target_content)
+                target_chapters.append(target_content)
+        
+        if variants:
+            # 三个版本互不依赖，并行写出；ZIP压缩和文件写入期间会释放GIL
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                futures = [
+                    executor.submit(_write_book, book, chapters, toc, output_path, compress_level),
+                    executor.submit(_write_book, source_book, source_chapters, toc, variant_paths[0],
+                                    compress_level),
+                    executor.submit(_write_book, target_book, target_chapters, toc, variant_paths[1],
+                                    compress_level),
+                ]
+                for future in futures:
+                    future.result()
+            
+            # 单语言版本写出成功后再记录哈希
+            with open(hash_path, "w", encoding="utf-8") as f:
+                f.write(digest)
+        else:
+            _write_book(book, chapters, toc, output_path, compress_level)
+    finally:
+        spool.close()
     
     return output_path
 
-def create_chapter_html(document: Document, chapter: Chapter, bilingual: bool, language: str, css_item: epub.EpubItem) -> epub.EpubHtml:
+def _chapter_bodies(document: Document, chapter: Chapter, bilingual: bool,
+                    content_selector: Callable[[Paragraph], str] = _source_text,
+                    emit_translation: Optional[bool] = None) -> Tuple[str, Optional[str], Optional[str]]:
     """
-    创建章节HTML
+    一次遍历章节段落，生成章节正文HTML
     
     Args:
         document: 文档对象
         chapter: 章节对象
-        bilingual: 是否双语
-        language: 语言
-        css_item: CSS项目
-        
+        bilingual: 是否双语，双语时同时生成两个单语言版本的正文
+        content_selector: 返回段落正文HTML文本（已转义）的函数，默认使用原文
+        emit_translation: 是否在正文后附加译文，默认与bilingual一致
+    
     Returns:
-        章节HTML
+        (正文HTML, 源语言正文HTML, 目标语言正文HTML)，非双语模式时后两项为None
     """
-    # 清理章节标题作为文件名
-    file_name = f"chapter_{chapter.id}.xhtml"
+    if emit_translation is None:
+        emit_translation = bilingual
     
-    # 创建章节
-    epub_chapter = epub.EpubHtml(
-        title=chapter.title,
-        file_name=file_name,
-        lang=language
-    )
+    # 按ID查找段落的方法只取一次
+    paras_get = document.paragraphs.get
     
-    # 构建章节内容
-    content_html = f"<h1>{chapter.title}</h1>\n"
+    # 章节开头的标题，正文各段HTML由生成器产出，最后统一拼接
+    heading = f"<h1>{html.escape(chapter.title, quote=False)}</h1>"
+    head = [heading]
     
     # 章节标题段落
-    title_para = None
-    for para_id in chapter.paragraphs:
-        para = document.paragraphs.get(para_id)
-        if para and para.is_title:
-            title_para = para
-            break
-    
-    # 如果找到标题段落且为双语模式，添加译文标题
-    if title_para and bilingual and title_para.is_translated:
-        content_html += f"<h2 class='translated-title'>{title_para.translated}</h2>\n"
-    
-    # 处理章节中的每个段落
-    for para_id in chapter.paragraphs:
-        para = document.paragraphs.get(para_id)
-        if para and not para.is_title:  # 跳过标题段落，已单独处理
-            content_html += f"<p>{para.content}</p>\n"
-            
-            if bilingual and para.is_translated:
-                content_html += f"<p class='translation'>{para.translated}</p>\n"
-    
-    # 设置章节内容
-    epub_chapter.content = f"""
-    <html>
-    <head>
-        <title>{chapter.title}</title>
-        <link rel="stylesheet" href="style/main.css" type="text/css" />
-    </head>
-    <body>
-        {content_html}
-    </body>
-    </html>
+    title_para = paras_get(chapter.title_paragraph_id)
+    
+    # 如果找到标题段落且需要附加译文，添加译文标题
+    if title_para and emit_translation and title_para.is_translated:
+        head.append(f"<h2 class='translated-title'>{title_para.escaped_translated}</h2>")
+    
+    # 处理章节中的每个段落，跳过标题段落（已单独处理）
+    paras = [para for para in map(paras_get, chapter.paragraphs) if para and not para.is_title]
+    content_html = _join_html(head, _paragraphs_html(paras, content_selector, emit_translation))
+    
+    if not bilingual:
+        return content_html, None, None
+    return (
+        content_html,
+        _join_html((heading,), map(_P_HTML, map(_source_text, paras))),
+        _join_html((heading,), map(_P_HTML, map(_target_text, paras))),
+    )
+
+def create_chapter_html(document: Document, chapter: Chapter, bilingual: bool, language: str, css_item: epub.EpubItem,
+                        content_selector: Callable[[Paragraph], str] = _source_text,
+                        emit_translation: Optional[bool] = None) -> epub.EpubHtml:
     """
+    创建章节HTML
     
-    return epub_chapter
+    Args:
+        document: 文档对象
+        chapter: 章节对象
+        bilingual: 是否双语
+        language: 语言
+        css_item: CSS项目
+        content_selector: 返回段落正文HTML文本（已转义）的函数，默认使用原文
+        emit_translation: 是否在正文后附加译文，默认与bilingual一致
+    
+    Returns:
+        章节HTML
+    """
+    if emit_translation is None:
+        emit_translation = bilingual
+    content_html, _, _ = _chapter_bodies(document, chapter, False, content_selector, emit_translation)
+    return _create_page(chapter.title, f"chapter_{chapter.id}.xhtml", language, content_html)
 
 def format_single_language_epub(document: Document, target_language: bool, options: Dict[str, Any], output_path: str) -> str:
     """
@@ -270,39 +503,16 @@ def format_single_language_epub(document: Document, target_language: bool, optio
         target_language: 是否为目标语言
         options: 格式选项
         output_path: 输出路径
-        
+    
     Returns:
         输出文件路径
     """
-    # 创建临时文档副本，根据语言选择设置内容
-    temp_doc = Document(
-        id=document.id,
-        title=document.title,
-        source_language=document.source_language if not target_language else document.target_language,
-        target_language=document.target_language if not target_language else document.source_language
-    )
-    
-    # 复制段落和章节结构
-    for para_id, para in document.paragraphs.items():
-        new_para = Paragraph(
-            id=para.id,
-            content=para.translated if target_language and para.is_translated else para.content,
-            chapter=para.chapter,
-            is_title=para.is_title,
-            is_translated=False  # 单语言版本中不需要翻译标记
-        )
-        temp_doc.paragraphs[para_id] = new_para
-    
-    for chapter_id, chapter in document.chapters.items():
-        temp_doc.chapters[chapter_id] = Chapter(
-            id=chapter.id,
-            title=chapter.title,
-            paragraphs=chapter.paragraphs.copy()
-        )
-    
-    # 使用标准EPUB导出
+    # 直接按语言选择段落正文，不复制文档
+    options = dict(options)
     options["bilingual_output"] = False
-    return format_as_epub(temp_doc, options, output_path)
+    options.setdefault("language", document.target_language if target_language else document.source_language)
+    content_selector = _target_text if target_language else _source_text
+    return format_as_epub(document, options, output_path, content_selector=content_selector, emit_translation=False)
 
 # 默认CSS样式
 DEFAULT_CSS = """
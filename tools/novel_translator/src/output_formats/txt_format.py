@@ -5,21 +5,31 @@
 """
 
 import os
+from contextlib import ExitStack
 from typing import Dict, Any, List, Optional
 from pathlib import Path
 
 from ..models import Document, Paragraph, Chapter
-from ..utils import ensure_dir, write_text_file
+from ..utils import ensure_dir
+
+# 输出文件的写缓冲区大小
+TXT_BUFFER_SIZE = 1 << 16
+
+def _title_block(text: str) -> str:
+    """生成带下划线的章节标题文本"""
+    return f"\n{text}\n{'-' * len(text)}\n\n"
 
 def format_as_txt(document: Document, options: Dict[str, Any], output_path: str) -> str:
     """
     将文档导出为文本格式
     
+    内容边生成边写入文件，不在内存中拼接整个文本。
+    
     Args:
         document: 文档对象
         options: 格式选项
         output_path: 输出路径
-        
+    
     Returns:
         输出文件路径
     """
@@ -32,63 +42,67 @@ def format_as_txt(document: Document, options: Dict[str, Any], output_path: str)
     output_dir = os.path.dirname(output_path)
     ensure_dir(output_dir)
     
-    # 构建输出内容
-    lines = []
-    
-    # 添加标题
-    if document.title:
-        lines.append(document.title)
-        lines.append("=" * len(document.title))
-        lines.append("")
-    
-    # 按顺序处理每个段落
-    sorted_paras = sorted(document.paragraphs.values(), key=lambda p: p.id)
-    
-    # 当前章节
-    current_chapter = None
-    
-    for para in sorted_paras:
-        # 检查是否为章节标题
-        if para.is_title and include_titles:
-            chapter_id = para.chapter
-            if chapter_id is not None and chapter_id in document.chapters:
-                chapter = document.chapters[chapter_id]
-                current_chapter = chapter
-                
-                lines.append("")
-                lines.append(para.content)
-                lines.append("-" * len(para.content))
-                
-                if bilingual and para.is_translated:
-                    lines.append(para.translated)
-                    lines.append("-" * len(para.translated))
-                
-                lines.append("")
-        # 普通段落
-        elif not para.is_title:
-            # 添加原文
-            lines.append(para.content)
-            
-            # 如果是双语模式，添加译文
-            if bilingual and para.is_translated:
-                lines.append("")
-                lines.append(para.translated)
-            
-            lines.append("")
-    
-    # 写入文件
-    content = "\n".join(lines)
-    write_text_file(output_path, content, encoding)
-    
-    # 如果是双语模式，再生成两个单语言的版本
-    if bilingual:
-        # 源语言版本
-        source_path = f"{os.path.splitext(output_path)[0]}_source.txt"
-        format_single_language_txt(document, False, source_path, encoding)
+    with ExitStack() as stack:
+        out = stack.enter_context(open(output_path, "w", encoding=encoding, buffering=TXT_BUFFER_SIZE))
+        
+        # 双语模式下同时写出两个单语言版本，只遍历一次段落
+        if bilingual:
+            stem = os.path.splitext(output_path)[0]
+            source_path = f"{stem}_source.txt"
+            target_path = f"{stem}_target.txt"
+            source_out = stack.enter_context(open(source_path, "w", encoding=encoding, buffering=TXT_BUFFER_SIZE))
+            target_out = stack.enter_context(open(target_path, "w", encoding=encoding, buffering=TXT_BUFFER_SIZE))
+        
+        # 添加标题
+        if document.title:
+            header = f"{document.title}\n{'=' * len(document.title)}\n\n"
+            out.write(header)
+            if bilingual:
+                source_out.write(header)
+                target_out.write(header)
+        
+        # 章节表在循环中用于判断标题段落，预先取到局部变量
+        chapters = document.chapters
         
-        # 目标语言版本
-        target_path = f"{os.path.splitext(output_path)[0]}_target.txt"
-        format_single_language_txt(document, True, target_path, encoding)
+        # 按顺序处理每个段落，双语判断放在循环外，两种模式各用一个循环
+        if bilingual:
+            for para in document.sorted_paragraphs:
+                # 检查是否为章节标题
+                if para.is_title:
+                    chapter_id = para.chapter
+                    if chapter_id is None or chapter_id not in chapters:
+                        continue
+                    
+                    if include_titles:
+                        if para.is_translated:
+                            out.write(f"\n{para.content}\n{'-' * len(para.content)}\n"
+                                      f"{para.translated}\n{'-' * len(para.translated)}\n\n")
+                        else:
+                            out.write(_title_block(para.content))
+                    
+                    # 单语言版本总是包含章节标题
+                    source_out.write(_title_block(para.content))
+                    target_out.write(_title_block(para.translated if para.is_translated else para.content))
+                # 普通段落，在原文后添加译文
+                elif para.is_translated:
+                    out.write(f"{para.content}\n\n{para.translated}\n\n")
+                    source_out.write(f"{para.content}\n\n")
+                    target_out.write(f"{para.translated}\n\n")
+                else:
+                    text = f"{para.content}\n\n"
+                    out.write(text)
+                    source_out.write(text)
+                    target_out.write(text)
+        else:
+            for para in document.sorted_paragraphs:
+                # 检查是否为章节标题
+                if para.is_title:
+                    chapter_id = para.chapter
+                    if include_titles and chapter_id is not None and chapter_id in chapters:
+                        out.write(_title_block(para.content))
+                # 普通段落
+                else:
+                    out.write(f"{para.content}\n\n")
     
     return output_path
 
@@ -101,7 +115,7 @@ def format_single_language_txt(document: Document, target_language: bool, output
         target_language: 是否为目标语言
         output_path: 输出路径
         encoding: 文件编码
-        
+    
     Returns:
         输出文件路径
     """
@@ -109,50 +123,26 @@ def format_single_language_txt(document: Document, target_language: bool, output
     output_dir = os.path.dirname(output_path)
     ensure_dir(output_dir)
     
-    # 构建输出内容
-    lines = []
-    
-    # 添加标题
-    if document.title:
-        lines.append(document.title)
-        lines.append("=" * len(document.title))
-        lines.append("")
-    
-    # 按顺序处理每个段落
-    sorted_paras = sorted(document.paragraphs.values(), key=lambda p: p.id)
-    
-    # 当前章节
-    current_chapter = None
-    
-    for para in sorted_paras:
-        # 检查是否为章节标题
-        if para.is_title:
-            chapter_id = para.chapter
-            if chapter_id is not None and chapter_id in document.chapters:
-                chapter = document.chapters[chapter_id]
-                current_chapter = chapter
-                
-                lines.append("")
-                if target_language and para.is_translated:
-                    lines.append(para.translated)
-                    lines.append("-" * len(para.translated))
-                else:
-                    lines.append(para.content)
-                    lines.append("-" * len(para.content))
-                
-                lines.append("")
-        # 普通段落
-        elif not para.is_title:
+    with open(output_path, "w", encoding=encoding, buffering=TXT_BUFFER_SIZE) as out:
+        # 添加标题
+        if document.title:
+            out.write(f"{document.title}\n{'=' * len(document.title)}\n\n")
+        
+        # 章节表在循环中用于判断标题段落，预先取到局部变量
+        chapters = document.chapters
+        
+        # 按顺序处理每个段落
+        for para in document.sorted_paragraphs:
             # 根据语言选择
-            if target_language and para.is_translated:
-                lines.append(para.translated)
-            else:
-                lines.append(para.content)
+            text = para.translated if target_language and para.is_translated else para.content
             
-            lines.append("")
-    
-    # 写入文件
-    content = "\n".join(lines)
-    write_text_file(output_path, content, encoding)
+            # 检查是否为章节标题
+            if para.is_title:
+                chapter_id = para.chapter
+                if chapter_id is not None and chapter_id in chapters:
+                    out.write(_title_block(text))
+            # 普通段落
+            else:
+                out.write(f"{text}\n\n")
     
-    return output_path 
\ No newline at end of file
+    return output_path
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+请求限速工具
+"""
+
+import asyncio
+import threading
+import time
+from typing import Dict, Hashable
+
+class RateLimiter:
+    """令牌桶限速器，可在多个线程和协程之间共享"""
+    
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        初始化限速器
+        
+        Args:
+            rate: 每秒允许的请求数，小于等于0表示不限速
+            burst: 允许的突发请求数
+        """
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+        
+        # 降速窗口，penalize后速率减半并在窗口内线性恢复
+        self._penalty_start = 0.0
+        self._penalty_window = 0.0
+    
+    def _current_rate(self, now: float) -> float:
+        """当前生效的速率"""
+        elapsed = now - self._penalty_start
+        if elapsed >= self._penalty_window:
+            return self.rate
+        return self.rate * (0.5 + 0.5 * elapsed / self._penalty_window)
+    
+    def _reserve(self, tokens: float = 1) -> float:
+        """
+        预订令牌
+        
+        令牌不足时令牌数会变为负数，后续调用按顺序排队等待。
+        
+        Args:
+            tokens: 需要的令牌数
+        
+        Returns:
+            获得令牌前需要等待的秒数
+        """
+        if self.rate <= 0:
+            return 0.0
+        
+        with self._lock:
+            now = time.monotonic()
+            rate = self._current_rate(now)
+            self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * rate)
+            self._last_refill = now
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / rate
+    
+    def acquire(self, tokens: float = 1) -> None:
+        """获取令牌，必要时阻塞等待"""
+        delay = self._reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+    
+    async def acquire_async(self, tokens: float = 1) -> None:
+        """获取令牌，必要时异步等待"""
+        delay = self._reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+    
+    def penalize(self, seconds: float) -> None:
+        """
+        遇到限流或超时后降速
+        
+        速率立即减半，并在随后的seconds秒内线性恢复到原速率。
+        
+        Args:
+            seconds: 恢复所需的秒数
+        """
+        if self.rate <= 0 or seconds <= 0:
+            return
+        
+        with self._lock:
+            # 先按原速率结算到当前时刻，之后的补充按降低后的速率计算
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self._current_rate(now))
+            self._last_refill = now
+            self._penalty_start = now
+            self._penalty_window = seconds
+
+# 按键共享的限速器，同一服务和凭据的所有引擎实例共用一个令牌桶
+_shared_limiters: Dict[Hashable, RateLimiter] = {}
+_shared_limiters_lock = threading.Lock()
+
+def shared_limiter(key: Hashable, rate: float, burst: int = 1) -> RateLimiter:
+    """
+    获取进程内按键共享的限速器
+    
+    同一个键首次调用时按给定参数创建，之后返回同一个实例，忽略再次传入的参数。
+    
+    Args:
+        key: 共享键，如API地址和密钥
+        rate: 每秒允许的请求数，小于等于0表示不限速
+        burst: 允许的突发请求数
+    
+    Returns:
+        限速器
+    """
+    with _shared_limiters_lock:
+        limiter = _shared_limiters.get(key)
+        if limiter is None:
+            limiter = _shared_limiters[key] = RateLimiter(rate, burst)
+        return limiter
@@ -5,7 +5,10 @@
 """
 
 import os
+import copy
 import time
+import uuid
+import asyncio
 import json
 import logging
 from typing import Dict, Any, List, Optional, Tuple
@@ -14,34 +17,61 @@ from tqdm import tqdm
 import argparse
 import signal
 import sys
+import threading
 from pathlib import Path
 
-from .models import Document, Paragraph, Chapter, TranslationEngine
+from .models import Document, Paragraph, Chapter, TranslationEngine, TransientHTTPError, TranslationCancelled
+from .rate_limiter import RateLimiter
 from .engines import get_engine, list_engines
 from .output_formats import get_formatter, list_formats
 from .utils import (
     read_text_file, write_text_file, process_novel_text, 
     estimate_translation_cost, generate_translation_report,
-    load_glossary
+    load_glossary, GlossaryMatcher
 )
 from .config import DEFAULT_CONFIG
 
+# 术语译名在送翻文本中的标记
+TERM_OPEN = "<term>"
+TERM_CLOSE = "</term>"
+
+def _is_throttled(error: BaseException) -> bool:
+    """判断批次失败是否由限流或超时引起"""
+    # tenacity重试耗尽且未设置reraise时抛出RetryError，取最后一次尝试的异常
+    last_attempt = getattr(error, "last_attempt", None)
+    if last_attempt is not None and last_attempt.failed:
+        error = last_attempt.exception()
+    if isinstance(error, (TransientHTTPError, TimeoutError)):
+        return True
+    # 各HTTP库的超时异常和带状态码的API异常
+    return getattr(error, "status_code", None) == 429 or "Timeout" in type(error).__name__
+
 class NovelTranslator:
     """小说翻译器"""
     
-    def __init__(self, config: Dict[str, Any] = None):
+    def __init__(self, config: Dict[str, Any] = None, engine: Optional[TranslationEngine] = None,
+                 request_limiter: Optional[RateLimiter] = None, char_limiter: Optional[RateLimiter] = None,
+                 handle_signals: bool = True):
         """
         初始化翻译器
         
         Args:
             config: 配置字典，不传递则使用默认配置
+            engine: 已创建的翻译引擎，多个翻译器可共享同一个引擎及其缓存，不传递则按配置创建
+            request_limiter: 每秒请求数限速器，多个翻译器共享时限速对所有翻译器合计生效，
+                不传递则按配置的rate_limit_rps创建
+            char_limiter: 每分钟字符数限速器，共享方式同上，不传递则按配置的rate_limit_cpm创建
+            handle_signals: 是否注册中断信号处理器，只能在主线程中注册；
+                由调用方统一处理中断时传False
         """
         self.config = config or DEFAULT_CONFIG.copy()
         self.logger = logging.getLogger("novel_translator")
         
         # 初始化翻译引擎
-        engine_name = self.config.get("default_engine", "caiyun")
-        self.engine = get_engine(engine_name, self.config)
+        if engine is None:
+            engine_name = self.config.get("default_engine", "caiyun")
+            engine = get_engine(engine_name, self.config)
+        self.engine = engine
         
         # 加载术语表
         self.glossary = {}
@@ -49,6 +79,27 @@ class NovelTranslator:
         if glossary_file:
             self.glossary = load_glossary(glossary_file)
         
+        # 翻译前把术语替换为带标记的译名，翻译后去掉标记
+        # 带标记的译名只在这里生成一次，两个方向各编译一个替换器
+        self._glossary_wrapped = {
+            term: f"{TERM_OPEN}{replacement}{TERM_CLOSE}" for term, replacement in self.glossary.items()
+        }
+        self._glossary_reverse = {
+            wrapped: self.glossary[term] for term, wrapped in self._glossary_wrapped.items()
+        }
+        self._glossary_marker = GlossaryMatcher(self._glossary_wrapped)
+        self._glossary_unmarker = GlossaryMatcher(self._glossary_reverse)
+        
+        # 翻译器层面的限速，所有批次共享：每秒请求数和每分钟字符数，为0时不限制
+        if request_limiter is None:
+            request_limiter = RateLimiter(self.config.get("rate_limit_rps", 0))
+        if char_limiter is None:
+            cpm = self.config.get("rate_limit_cpm", 0)
+            char_limiter = RateLimiter(cpm / 60, burst=int(cpm))
+        self.request_limiter = request_limiter
+        self.char_limiter = char_limiter
+        self.rate_limit_penalty = self.config.get("rate_limit_penalty", 30)
+        
         # 创建输出目录
         output_dir = self.config.get("output_dir", "output")
         os.makedirs(output_dir, exist_ok=True)
@@ -58,24 +109,106 @@ class NovelTranslator:
         self.progress_dir.mkdir(exist_ok=True, parents=True)
         
         # 注册信号处理器
-        signal.signal(signal.SIGINT, self._handle_interrupt)
-        signal.signal(signal.SIGTERM, self._handle_interrupt)
+        if handle_signals:
+            signal.signal(signal.SIGINT, self._handle_interrupt)
+            signal.signal(signal.SIGTERM, self._handle_interrupt)
         
         self.current_document = None
         
         # 进度回调函数
         self.progress_callback = None
+        
+        # 暂停和取消状态，pause/resume/cancel可从任意线程调用；
+        # 翻译进行中由事件循环中的asyncio.Event转达给等待开始的批次
+        self._running = threading.Event()
+        self._running.set()
+        self._cancelled = threading.Event()
+        self._loop = None
+        self._resume_event = None
+    
+    def spawn(self) -> "NovelTranslator":
+        """
+        创建与当前翻译器共享翻译引擎和限速器的新翻译器，用于并行翻译多个文件
+        
+        翻译时会修改翻译器的配置和当前文档，新翻译器使用独立的配置副本；
+        引擎及其缓存、请求数和字符数限速器共享，配置的限速对所有翻译器合计生效。
+        新翻译器不注册信号处理器。
+        
+        Returns:
+            新的翻译器
+        """
+        return NovelTranslator(
+            copy.deepcopy(self.config),
+            engine=self.engine,
+            request_limiter=self.request_limiter,
+            char_limiter=self.char_limiter,
+            handle_signals=False
+        )
+    
+    def save_current_progress(self) -> Optional[Path]:
+        """
+        保存正在翻译的文档的进度
+        
+        Returns:
+            进度文件路径，没有正在翻译的文档时返回None
+        """
+        document = self.current_document
+        if document is None:
+            return None
+        progress_file = self.progress_dir / f"{document.id}_progress.json"
+        document.save_progress(progress_file)
+        return progress_file
     
     def set_progress_callback(self, callback):
         """
         设置进度回调函数
         
+        回调在翻译的事件循环中调用，不能阻塞；暂停和取消请调用pause、resume和cancel。
+        
         Args:
             callback: 回调函数，接收三个参数：当前段落索引，总段落数，当前段落文本
-                      返回True继续翻译，返回False暂停翻译
         """
         self.progress_callback = callback
     
+    def pause(self) -> None:
+        """暂停翻译，已经发出的请求会继续完成，可从任意线程调用"""
+        self._running.clear()
+        self._notify_loop()
+    
+    def resume(self) -> None:
+        """恢复暂停的翻译，可从任意线程调用"""
+        self._running.set()
+        self._notify_loop()
+    
+    def cancel(self) -> None:
+        """
+        取消翻译，可从任意线程调用
+        
+        已经发出的请求完成后，translate_document保存进度并抛出TranslationCancelled。
+        """
+        self._cancelled.set()
+        self._running.set()
+        self._notify_loop()
+    
+    def _notify_loop(self) -> None:
+        """在翻译的事件循环中同步暂停状态"""
+        loop = self._loop
+        if loop is None:
+            return
+        try:
+            loop.call_soon_threadsafe(self._sync_resume_event)
+        except RuntimeError:
+            pass  # 事件循环已经结束
+    
+    def _sync_resume_event(self) -> None:
+        """按暂停状态设置或清除事件循环中的恢复事件，只在事件循环线程中调用"""
+        if self._resume_event is None:
+            return
+        if self._running.is_set():
+            self._resume_event.set()
+        else:
+            self._resume_event.clear()
+    
     def translate_file(self, file_path: str, output_format: str = None, **kwargs) -> str:
         """
         翻译文件
@@ -84,7 +217,7 @@ class NovelTranslator:
             file_path: 文件路径
             output_format: 输出格式，不传则使用配置中的默认格式
             **kwargs: 其他参数，将覆盖配置
-            
+        
         Returns:
             输出文件路径
         """
@@ -104,6 +237,10 @@ class NovelTranslator:
         # 处理文本
         document = process_novel_text(text)
         
+        # 进度文件和报告以文档ID命名，批量翻译时多个文件同时处理，
+        # 以输入文件名加随机后缀作为ID，避免同一秒开始的文档相互覆盖
+        document.id = f"{Path(file_path).stem}_{uuid.uuid4().hex[:8]}"
+        
         # 设置语言
         document.source_language = self.config.get("source_language", "zh")
         document.target_language = self.config.get("target_language", "en")
@@ -133,19 +270,12 @@ class NovelTranslator:
         
         Args:
             document: 文档对象
-            
+        
         Returns:
             翻译后的文档对象
         """
         self.current_document = document
         
-        # 检查预算限制
-        budget_limit = self.config.get("budget_limit", 0)
-        if budget_limit > 0:
-            cost_info = estimate_translation_cost(document, self.engine.get_name())
-            if cost_info["cost"] > budget_limit:
-                raise ValueError(f"翻译成本({cost_info['cost']} {cost_info['currency']})超过预算限制({budget_limit} {cost_info['currency']})")
-        
         # 进度保存频率
         save_interval = self.config.get("save_interval", 1)
         progress_file = self.progress_dir / f"{document.id}_progress.json"
@@ -153,20 +283,33 @@ class NovelTranslator:
         # 翻译开始时间
         start_time = time.time()
         
-        # 记录已处理的段落数
-        processed_count = 0
-        
         # 获取需要翻译的段落
-        paragraphs_to_translate = []
-        for para_id, para in sorted(document.paragraphs.items(), key=lambda x: x[0]):
-            if not para.is_translated:
-                paragraphs_to_translate.append(para)
+        paragraphs_to_translate = [document.paragraphs[para_id] for para_id in document.untranslated_ids]
         
         # 显示翻译信息
-        total_chars = sum(len(p.content) for p in paragraphs_to_translate)
+        total_chars = document.pending_chars
         cost_info = estimate_translation_cost(document, self.engine.get_name())
         self.logger.info(f"即将翻译{len(paragraphs_to_translate)}个段落，约{total_chars}个字符")
         self.logger.info(f"预计成本: {cost_info['cost']} {cost_info['currency']}")
+        engine_cost = self.engine.estimate_cost_batch([p.content for p in paragraphs_to_translate])
+        self.logger.info(f"按引擎计价预计剩余成本: {engine_cost:.4f} {self.engine.currency}")
+        
+        # 检查预算限制，只计算尚未翻译且未命中缓存的段落；
+        # 预算以元为单位，引擎按其他货币计价时先按配置的汇率换算
+        budget_limit = self.config.get("budget_limit", 0)
+        if budget_limit > 0:
+            currency = self.engine.currency
+            if currency == "CNY":
+                cost_cny = engine_cost
+            else:
+                rate = self.config.get("exchange_rates", {}).get(currency)
+                if rate is None:
+                    raise ValueError(f"缺少{currency}兑人民币的汇率，无法检查预算限制，请在exchange_rates中配置")
+                cost_cny = engine_cost * rate
+            if cost_cny > budget_limit:
+                raise ValueError(
+                    f"翻译成本({engine_cost:.2f} {currency}，约{cost_cny:.2f}元)超过预算限制({budget_limit}元)"
+                )
         
         # 并行翻译
         parallel_requests = min(self.config.get("parallel_requests", 3), 10)
@@ -175,33 +318,19 @@ class NovelTranslator:
         # 按批次进行翻译
         batches = [paragraphs_to_translate[i:i+batch_size] for i in range(0, len(paragraphs_to_translate), batch_size)]
         
-        # 翻译进度条
+        # 翻译进度条，最多parallel_requests个批次同时进行
         total_paragraphs = len(paragraphs_to_translate)
         with tqdm(total=total_paragraphs, desc="翻译进度") as pbar:
-            for batch in batches:
-                # 通知进度
-                if self.progress_callback:
-                    # 如果进度回调返回False，则暂停翻译
-                    current_text = batch[0].content if batch else ""
-                    if not self.progress_callback(processed_count, total_paragraphs, current_text):
-                        self.logger.info("翻译已暂停")
-                        # 等待继续信号
-                        while True:
-                            time.sleep(0.5)
-                            if self.progress_callback(processed_count, total_paragraphs, current_text):
-                                self.logger.info("翻译已恢复")
-                                break
-                
-                # 翻译批次
-                self._translate_batch(document, batch)
-                
-                # 更新进度
-                processed_count += len(batch)
-                pbar.update(len(batch))
-                
-                # 保存进度
-                if processed_count % save_interval == 0 or processed_count == total_paragraphs:
-                    document.save_progress(progress_file)
+            try:
+                asyncio.run(self._run_batches(document, batches, parallel_requests, pbar, progress_file, save_interval))
+            except TranslationCancelled:
+                document.save_progress(progress_file)
+                self.current_document = None
+                self.logger.info(f"翻译已取消，进度已保存至: {progress_file}")
+                raise
+            finally:
+                self._loop = None
+                self._resume_event = None
         
         # 翻译结束时间
         end_time = time.time()
@@ -220,51 +349,138 @@ class NovelTranslator:
         
         return document
     
-    def _translate_batch(self, document: Document, paragraphs: List[Paragraph]) -> None:
+    async def _run_batches(self, document: Document, batches: List[List[Paragraph]], parallel_requests: int,
+                           pbar: tqdm, progress_file: Path, save_interval: int) -> None:
+        """
+        并发翻译所有批次
+        
+        Args:
+            document: 文档对象
+            batches: 段落批次列表
+            parallel_requests: 同时进行的批次数上限
+            pbar: 进度条
+            progress_file: 进度文件路径
+            save_interval: 完整保存进度的最少段落数
+        """
+        semaphore = asyncio.Semaphore(max(1, parallel_requests))
+        total_paragraphs = sum(len(batch) for batch in batches)
+        
+        # 暂停时各批次等待恢复事件，不阻塞事件循环
+        self._resume_event = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        self._sync_resume_event()
+        
+        # 完整进度按时间间隔保存，两次保存之间的译文追加到进度日志
+        save_interval_seconds = self.config.get("save_interval_seconds", 30)
+        last_save = time.monotonic()
+        unsaved_count = 0
+        
+        # 已处理的段落数，只在事件循环线程中更新
+        processed_count = 0
+        
+        async def run(batch: List[Paragraph]) -> Optional[List[Paragraph]]:
+            async with semaphore:
+                if not await self._wait_if_paused(processed_count, total_paragraphs, batch[0].content):
+                    return None
+                await self._translate_batch_async(document, batch)
+            return batch
+        
+        # 按完成顺序更新进度并保存
+        for future in asyncio.as_completed([run(batch) for batch in batches]):
+            batch = await future
+            if batch is None:
+                raise TranslationCancelled("翻译已取消")
+            processed_count += len(batch)
+            unsaved_count += len(batch)
+            pbar.update(len(batch))
+            
+            now = time.monotonic()
+            if processed_count == total_paragraphs or (
+                unsaved_count >= save_interval and now - last_save >= save_interval_seconds
+            ):
+                document.save_progress(progress_file)
+                last_save = now
+                unsaved_count = 0
+            else:
+                document.append_progress(progress_file, batch)
+            
+            # 取消后不再等待其余批次，未开始的批次不会发出请求
+            if self._cancelled.is_set() and processed_count < total_paragraphs:
+                raise TranslationCancelled("翻译已取消")
+    
+    async def _wait_if_paused(self, current: int, total: int, text: str) -> bool:
+        """
+        暂停时等待恢复，然后通知进度
+        
+        Args:
+            current: 已处理的段落数
+            total: 总段落数
+            text: 即将翻译的文本
+        
+        Returns:
+            可以继续翻译时返回True，翻译已取消时返回False
+        """
+        if not self._resume_event.is_set():
+            self.logger.info("翻译已暂停")
+            await self._resume_event.wait()
+            if not self._cancelled.is_set():
+                self.logger.info("翻译已恢复")
+        
+        if self._cancelled.is_set():
+            return False
+        
+        if self.progress_callback:
+            self.progress_callback(current, total, text)
+        return True
+    
+    async def _translate_batch_async(self, document: Document, paragraphs: List[Paragraph]) -> None:
         """
         翻译段落批次
         
+        引擎的同步请求在线程中执行，结果回到事件循环线程后再写入文档，文档统计不会被并发修改。
+        
         Args:
             document: 文档对象
             paragraphs: 段落列表
         """
-        # 翻译前处理
-        contents = []
-        for para in paragraphs:
-            # 按术语表替换内容
-            content = para.content
-            for term, replacement in self.glossary.items():
-                content = content.replace(term, f"<term>{replacement}</term>")
-            contents.append(content)
+        # 翻译前处理，按术语表替换内容
+        contents = [self._glossary_marker.replace(para.content) for para in paragraphs]
         
         # 调用批量翻译
         try:
-            translated = self.engine.batch_translate(contents)
+            # 等待限速器放行
+            await self.request_limiter.acquire_async()
+            await self.char_limiter.acquire_async(sum(map(len, contents)))
+            
+            start_time = time.time()
+            translated = await asyncio.to_thread(self.engine.batch_translate, contents)
+            # 批量翻译无法区分单个段落的耗时，按段落平均分摊
+            seconds = (time.time() - start_time) / len(paragraphs)
             
             # 处理翻译结果
             for i, para in enumerate(paragraphs):
-                # 记录翻译状态
-                para.translated = translated[i]
-                para.is_translated = True
-                para.translation_time = time.time()
-                
-                # 恢复术语标记
-                for term, replacement in self.glossary.items():
-                    para.translated = para.translated.replace(f"<term>{replacement}</term>", replacement)
+                # 恢复术语标记，译文中没有标记时无需扫描
+                text = translated[i]
+                if TERM_OPEN in text:
+                    text = self._glossary_unmarker.replace(text)
                 
-                # 更新文档中的段落
-                document.paragraphs[para.id] = para
+                # 记录翻译状态并更新文档统计
+                document.mark_translated(para.id, text, seconds=seconds)
                 
                 # 通知进度回调当前段落已翻译
                 if self.progress_callback and i < len(paragraphs) - 1:
                     next_para = paragraphs[i + 1].content if i + 1 < len(paragraphs) else ""
                     self.progress_callback(
-                        sum(1 for p in document.paragraphs.values() if p.is_translated),
+                        document.translated_count,
                         len(document.paragraphs),
                         next_para
                     )
         except Exception as e:
             self.logger.error(f"翻译批次失败: {e}")
+            # 被限流或超时后降低后续请求的速率，避免集中重试
+            if _is_throttled(e):
+                self.request_limiter.penalize(self.rate_limit_penalty)
+                self.char_limiter.penalize(self.rate_limit_penalty)
             # 标记失败
             for para in paragraphs:
                 para.attempts += 1
@@ -276,7 +492,7 @@ class NovelTranslator:
         Args:
             document: 文档对象
             output_format: 输出格式
-            
+        
         Returns:
             输出文件路径
         """
@@ -294,6 +510,7 @@ class NovelTranslator:
             "include_titles": True,
             "author": self.config.get("author", "Novel Translator"),
             "language": document.target_language,
+            "compress_level": self.config.get("compress_level", 3),
         }
         
         # 导出文档
@@ -313,9 +530,8 @@ class NovelTranslator:
         self.logger.warning("接收到中断信号，保存进度并退出...")
         
         # 保存当前文档进度
-        if self.current_document:
-            progress_file = self.progress_dir / f"{self.current_document.id}_progress.json"
-            self.current_document.save_progress(progress_file)
+        progress_file = self.save_current_progress()
+        if progress_file:
             self.logger.info(f"进度已保存至: {progress_file}")
         
         sys.exit(0)
@@ -329,11 +545,11 @@ def main():
     parser.add_argument("-o", "--output", help="输出格式", choices=list(list_formats().keys()), default="txt")
     parser.add_argument("-s", "--source", help="源语言", default="zh")
     parser.add_argument("-t", "--target", help="目标语言", default="en")
-    parser.add_argument("-e", "--engine", help="翻译引擎", choices=list(list_engines().keys()), default="caiyun")
+    parser.add_argument("-e", "--engine", help="翻译引擎", choices=list_engines(), default="caiyun")
     parser.add_argument("-b", "--bilingual", help="双语模式", action="store_true")
     parser.add_argument("-g", "--glossary", help="术语表文件路径")
     parser.add_argument("--title", help="文档标题，不指定则使用文件名")
-    parser.add_argument("--budget", help="预算限制", type=float, default=0)
+    parser.add_argument("--budget", help="预算限制(元)", type=float, default=0)
     
     args = parser.parse_args()
     
@@ -7,9 +7,10 @@
 import os
 import re
 import json
+import itertools
 import time
 from pathlib import Path
-from typing import List, Dict, Any, Tuple, Optional
+from typing import List, Dict, Any, Tuple, Optional, Iterator
 import unicodedata
 import chardet
 import nltk
@@ -17,6 +18,11 @@ from nltk.tokenize import sent_tokenize
 import logging
 from datetime import datetime
 
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
 from .models import Document, Paragraph, Chapter
 
 # 尝试下载NLTK数据
@@ -32,6 +38,20 @@ logging.basicConfig(
 )
 logger = logging.getLogger("novel_translator")
 
+# 检测编码时只取文件开头的这么多字节，更长的样本对检测结果几乎没有影响
+ENCODING_SNIFF_SIZE = 1 << 16
+
+# 按检测结果严格解码失败时依次尝试的编码，GB18030兼容GB2312和GBK
+FALLBACK_ENCODINGS = ('utf-8', 'gb18030', 'big5', 'shift_jis')
+_NON_ASCII_BYTE = re.compile(rb'[\x80-\xff]')
+
+def _detect_bytes_encoding(raw: bytes) -> str:
+    """根据文件开头的字节检测编码，纯ASCII或无法判断时按UTF-8处理"""
+    encoding = chardet.detect(raw[:ENCODING_SNIFF_SIZE])['encoding']
+    if not encoding or encoding.lower() == 'ascii':
+        return 'utf-8'
+    return encoding
+
 def detect_encoding(file_path: str) -> str:
     """
     检测文件编码
@@ -43,8 +63,7 @@ def detect_encoding(file_path: str) -> str:
         检测到的编码
     """
     with open(file_path, 'rb') as f:
-        result = chardet.detect(f.read())
-    return result['encoding']
+        return _detect_bytes_encoding(f.read(ENCODING_SNIFF_SIZE))
 
 def read_text_file(file_path: str) -> str:
     """
@@ -56,9 +75,54 @@ def read_text_file(file_path: str) -> str:
     Returns:
         文件内容
     """
-    encoding = detect_encoding(file_path)
+    # 只读取一次文件，用开头的字节检测编码后直接解码
+    with open(file_path, 'rb') as f:
+        raw = f.read()
+    encoding = _detect_bytes_encoding(raw)
+    try:
+        return raw.decode(encoding)
+    except UnicodeDecodeError:
+        pass
+    
+    # 开头的样本不足以判断编码（如前半部分是纯ASCII），从第一个非ASCII字节起重新检测，
+    # 仍失败时再依次尝试常见编码
+    candidates = []
+    match = _NON_ASCII_BYTE.search(raw)
+    if match and match.start() > 0:
+        start = match.start()
+        redetected = chardet.detect(raw[start:start + ENCODING_SNIFF_SIZE])['encoding']
+        if redetected:
+            candidates.append(redetected)
+    candidates.extend(FALLBACK_ENCODINGS)
+    for candidate in candidates:
+        if candidate.lower() == encoding.lower():
+            continue
+        try:
+            text = raw.decode(candidate)
+        except (UnicodeDecodeError, LookupError):
+            continue
+        logger.info(f"文件 {file_path} 按{encoding}解码失败，改用{candidate}")
+        return text
+    
+    logger.warning(f"无法确定文件 {file_path} 的编码，按{encoding}解码并替换无法识别的字符")
+    return raw.decode(encoding, errors='replace')
+
+def read_text_lines(file_path: str, limit: int, encoding: Optional[str] = None) -> List[str]:
+    """
+    读取文本文件的前若干行，不读取整个文件
+    
+    Args:
+        file_path: 文件路径
+        limit: 最多读取的行数
+        encoding: 文件编码，不传则自动检测
+        
+    Returns:
+        去掉行尾换行符的行列表
+    """
+    if encoding is None:
+        encoding = detect_encoding(file_path)
     with open(file_path, 'r', encoding=encoding) as f:
-        return f.read()
+        return [line.rstrip('\r\n') for _, line in zip(range(limit), f)]
 
 def write_text_file(file_path: str, content: str, encoding: str = 'utf-8') -> None:
     """
@@ -85,6 +149,14 @@ def ensure_dir(path: str) -> str:
     os.makedirs(path, exist_ok=True)
     return path
 
+# 规范化文本使用的模式
+_WHITESPACE_RE = re.compile(r'\s+')
+_DOUBLE_QUOTES_RE = re.compile('[\u201c\u201d]')
+_SINGLE_QUOTES_RE = re.compile('[\u2018\u2019]')
+
+# 段落为连续的非空行，遇到空行（可含空白字符）结束
+_PARAGRAPH_RE = re.compile(r'[^\n]+(?:\n(?!\s*\n)[^\n]+)*')
+
 def normalize_text(text: str) -> str:
     """
     规范化文本（去除多余空白，规范化Unicode等）
@@ -99,14 +171,30 @@ def normalize_text(text: str) -> str:
     text = unicodedata.normalize('NFKC', text)
     
     # 去除多余空白
-    text = re.sub(r'\s+', ' ', text)
+    text = _WHITESPACE_RE.sub(' ', text)
     
     # 规范化引号
-    text = re.sub(r'[""]', '"', text)
-    text = re.sub(r'['']', "'", text)
+    text = _DOUBLE_QUOTES_RE.sub('"', text)
+    text = _SINGLE_QUOTES_RE.sub("'", text)
     
     return text.strip()
 
+def iter_paragraphs(text: str) -> Iterator[str]:
+    """
+    逐个产出文本中的段落，不构建段落列表
+    
+    Args:
+        text: 文本
+        
+    Returns:
+        段落迭代器
+    """
+    # 段落之间以空行分隔，过滤空段落
+    for match in _PARAGRAPH_RE.finditer(text):
+        paragraph = match.group().strip()
+        if paragraph:
+            yield paragraph
+
 def split_paragraphs(text: str) -> List[str]:
     """
     将文本分割为段落
@@ -117,11 +205,23 @@ def split_paragraphs(text: str) -> List[str]:
     Returns:
         段落列表
     """
-    # 按连续的空行分割
-    paragraphs = re.split(r'\n\s*\n', text)
-    
-    # 过滤空段落
-    return [p.strip() for p in paragraphs if p.strip()]
+    return list(iter_paragraphs(text))
+
+# 常见的章节标题模式，合并为一个正则表达式，在模块加载时编译一次
+_CHAPTER_TITLE_RE = re.compile(
+    r'^(?:'
+    r'第\s*[0-9零一二三四五六七八九十百千万]+\s*[章节回集卷]'  # 中文章节（第一章、第1章）
+    r'|Chapter\s*[0-9]+'  # 英文章节
+    r'|CHAPTER\s*[0-9]+'
+    r'|[0-9]+\.'  # 数字标题 (1., 2.)
+    r'|[一二三四五六七八九十]+、'  # 中文数字标题 (一、二、)
+    r')'
+)
+
+# 提取章节号使用的模式
+_CN_CHAPTER_NUMBER_RE = re.compile(r'第\s*([0-9零一二三四五六七八九十百千万]+)\s*[章节回集卷]')
+_EN_CHAPTER_NUMBER_RE = re.compile(r'Chapter\s*([0-9]+)', re.IGNORECASE)
+_NUMBERED_TITLE_RE = re.compile(r'^([0-9]+)\.')
 
 def is_chapter_title(text: str) -> bool:
     """
@@ -133,17 +233,8 @@ def is_chapter_title(text: str) -> bool:
     Returns:
         是否为章节标题
     """
-    # 常见的章节标题模式
-    patterns = [
-        r'^第\s*[0-9零一二三四五六七八九十百千万]+\s*[章节回集卷]',  # 中文章节（第一章、第1章）
-        r'^Chapter\s*[0-9]+',  # 英文章节
-        r'^CHAPTER\s*[0-9]+',
-        r'^[0-9]+\.',  # 数字标题 (1., 2.)
-        r'^[一二三四五六七八九十]+、',  # 中文数字标题 (一、二、)
-    ]
-    
     # 判断是否匹配任一模式
-    return any(re.match(pattern, text) for pattern in patterns)
+    return _CHAPTER_TITLE_RE.match(text) is not None
 
 def extract_chapter_number(title: str) -> Optional[int]:
     """
@@ -163,7 +254,7 @@ def extract_chapter_number(title: str) -> Optional[int]:
     }
     
     # 尝试匹配中文章节
-    match = re.search(r'第\s*([0-9零一二三四五六七八九十百千万]+)\s*[章节回集卷]', title)
+    match = _CN_CHAPTER_NUMBER_RE.search(title)
     if match:
         num_str = match.group(1)
         # 判断是否为阿拉伯数字
@@ -191,12 +282,12 @@ def extract_chapter_number(title: str) -> Optional[int]:
             return total if total > 0 else None
     
     # 尝试匹配英文章节
-    match = re.search(r'Chapter\s*([0-9]+)', title, re.IGNORECASE)
+    match = _EN_CHAPTER_NUMBER_RE.search(title)
     if match:
         return int(match.group(1))
     
     # 尝试匹配数字标题
-    match = re.search(r'^([0-9]+)\.', title)
+    match = _NUMBERED_TITLE_RE.search(title)
     if match:
         return int(match.group(1))
     
@@ -212,11 +303,8 @@ def process_novel_text(text: str) -> Document:
     Returns:
         文档对象
     """
-    # 规范化文本
-    text = normalize_text(text)
-    
-    # 分割段落
-    paragraphs = split_paragraphs(text)
+    # 逐段分割并规范化，不生成规范化后的全文和段落列表
+    paragraphs = (normalize_text(paragraph) for paragraph in iter_paragraphs(text))
     
     # 创建文档
     document = Document(
@@ -226,14 +314,17 @@ def process_novel_text(text: str) -> Document:
         target_language="en"
     )
     
-    # 检测标题
-    if paragraphs and len(paragraphs[0]) < 100:
-        document.title = paragraphs[0]
-        paragraphs = paragraphs[1:]
-    
     # 当前章节ID
     current_chapter_id = None
     
+    # 检测标题，较长的首段放回段落序列作为正文处理
+    first = next(paragraphs, None)
+    if first is not None:
+        if len(first) < 100:
+            document.title = first
+        else:
+            paragraphs = itertools.chain((first,), paragraphs)
+    
     # 处理所有段落
     for paragraph in paragraphs:
         # 检查是否为章节标题
@@ -258,8 +349,8 @@ def estimate_translation_cost(document: Document, engine: str, char_cost: float
     Returns:
         成本信息
     """
-    # 计算总字符数
-    total_chars = sum(len(p.content) for p in document.paragraphs.values())
+    # 总字符数由文档在增加段落时累计
+    total_chars = document.total_chars
     
     if engine == "caiyun":
         # 彩云小译计算（以元为单位）
@@ -331,6 +422,61 @@ def generate_translation_report(document: Document, cost_info: Dict[str, Any], d
     
     return "\n".join(report)
 
+class GlossaryMatcher:
+    """
+    术语替换器
+    
+    所有术语编译为一个匹配器，每段文本只扫描一遍，按最左最长的原则替换互不重叠的匹配。
+    安装了pyahocorasick时使用Aho-Corasick自动机，否则使用按长度降序排列的正则表达式。
+    """
+    
+    def __init__(self, replacements: Dict[str, str]):
+        """
+        初始化替换器
+        
+        Args:
+            replacements: 术语 -> 替换文本
+        """
+        self.replacements = {term: value for term, value in replacements.items() if term}
+        self._automaton = None
+        self._pattern = None
+        if not self.replacements:
+            return
+        
+        if ahocorasick is not None:
+            self._automaton = ahocorasick.Automaton()
+            for term, value in self.replacements.items():
+                self._automaton.add_word(term, (len(term), value))
+            self._automaton.make_automaton()
+        else:
+            terms = sorted(self.replacements, key=len, reverse=True)
+            self._pattern = re.compile("|".join(map(re.escape, terms)))
+    
+    def replace(self, text: str) -> str:
+        """
+        替换文本中的所有术语
+        
+        Args:
+            text: 原始文本
+            
+        Returns:
+            替换后的文本
+        """
+        if self._automaton is not None:
+            parts = []
+            pos = 0
+            for end, (length, value) in self._automaton.iter_long(text):
+                parts.append(text[pos:end - length + 1])
+                parts.append(value)
+                pos = end + 1
+            if not parts:
+                return text
+            parts.append(text[pos:])
+            return "".join(parts)
+        if self._pattern is not None:
+            return self._pattern.sub(lambda match: self.replacements[match.group()], text)
+        return text
+
 def load_glossary(file_path: str) -> Dict[str, str]:
     """
     加载术语表
@@ -346,15 +492,16 @@ def load_glossary(file_path: str) -> Dict[str, str]:
     
     result = {}
     try:
+        # 一次读入整个文件再按行处理
         with open(file_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                line = line.strip()
-                if not line or line.startswith('#'):
-                    continue
-                parts = line.split('=', 1)
-                if len(parts) == 2:
-                    source, target = parts
-                    result[source.strip()] = target.strip()
+            data = f.read()
+        for line in data.splitlines():
+            line = line.strip()
+            if not line or line[0] == '#':
+                continue
+            source, sep, target = line.partition('=')
+            if sep:
+                result[source.strip()] = target.strip()
     except Exception as e:
         logger.error(f"加载术语表出错: {e}")
         
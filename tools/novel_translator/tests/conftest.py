@@ -0,0 +1,11 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+测试公共配置
+"""
+
+import os
+import sys
+
+# 测试以src包的形式导入被测模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+批量翻译分隔标记拆分测试
+"""
+
+from typing import Callable
+
+from src.models import TranslationEngine, BATCH_SEPARATOR, BATCH_SEPARATOR_PATTERN
+
+class ScriptedEngine(TranslationEngine):
+    """按给定函数改写合并请求译文的测试引擎，单段请求返回大写文本"""
+    
+    def __init__(self, rewrite: Callable[[str], str]):
+        super().__init__({"translation_cache": False, "memory_cache_size": 0, "parallel_requests": 1})
+        self.rewrite = rewrite
+        self.requests = []
+    
+    def get_name(self) -> str:
+        return "scripted"
+    
+    def translate(self, text: str) -> str:
+        self.requests.append(text)
+        if BATCH_SEPARATOR_PATTERN.search(text):
+            return self.rewrite(text.upper())
+        return text.upper()
+    
+    def estimate_cost(self, text: str) -> float:
+        return 0.0
+
+TEXTS = ["one", "two", "three"]
+EXPECTED = ["ONE", "TWO", "THREE"]
+
+def test_intact_markers_use_one_request():
+    engine = ScriptedEngine(lambda text: text)
+    assert engine.batch_translate(TEXTS) == EXPECTED
+    assert len(engine.requests) == 1
+
+def test_blank_texts_are_kept_in_place():
+    engine = ScriptedEngine(lambda text: text)
+    assert engine.batch_translate(["one", " ", "two"]) == ["ONE", "", "TWO"]
+
+def test_dropped_marker_falls_back_to_single_requests():
+    engine = ScriptedEngine(lambda text: text.replace(BATCH_SEPARATOR.format(2), ""))
+    assert engine.batch_translate(TEXTS) == EXPECTED
+    assert engine.requests[1:] == TEXTS
+
+def test_duplicated_marker_falls_back_to_single_requests():
+    marker = BATCH_SEPARATOR.format(2)
+    engine = ScriptedEngine(lambda text: text.replace(marker, f"{marker}EXTRA\n{marker}"))
+    assert engine.batch_translate(TEXTS) == EXPECTED
+    assert engine.requests[1:] == TEXTS
+
+def test_reordered_markers_are_matched_by_number():
+    def reverse(text: str) -> str:
+        parts = BATCH_SEPARATOR_PATTERN.split(text)
+        pairs = list(zip(parts[1::2], parts[2::2]))
+        return "\n".join(f"{BATCH_SEPARATOR.format(n)}{part.strip()}" for n, part in reversed(pairs))
+    
+    engine = ScriptedEngine(reverse)
+    assert engine.batch_translate(TEXTS) == EXPECTED
+    assert len(engine.requests) == 1
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+翻译缓存测试
+"""
+
+from src.cache import TranslationCache, MemoryCache
+from src.models import TranslationEngine
+
+class EchoEngine(TranslationEngine):
+    """原样返回文本的测试引擎"""
+    
+    def get_name(self) -> str:
+        return "echo"
+    
+    def translate(self, text: str) -> str:
+        return text
+    
+    def estimate_cost(self, text: str) -> float:
+        return 0.0
+
+class OtherEngine(EchoEngine):
+    """另一个引擎，与EchoEngine共用缓存目录"""
+
+def test_translation_cache_hit_and_miss(tmp_path):
+    cache = TranslationCache(str(tmp_path / "translations.db"))
+    key = TranslationCache.make_key("engine", "", "zh", "en", "你好")
+    assert cache.get(key) is None
+    
+    cache.set(key, "hello")
+    assert cache.get(key) == "hello"
+    
+    other = TranslationCache.make_key("engine", "", "zh", "en", "再见")
+    assert cache.get_many([key, other]) == {key: "hello"}
+    cache.close()
+
+def test_translation_cache_persists(tmp_path):
+    path = str(tmp_path / "translations.db")
+    key = TranslationCache.make_key("engine", "model", "zh", "en", "你好")
+    cache = TranslationCache(path)
+    cache.set(key, "hello")
+    cache.close()
+    
+    reopened = TranslationCache(path)
+    assert reopened.get(key) == "hello"
+    reopened.close()
+
+def test_make_key_separates_engine_model_and_languages():
+    keys = {
+        TranslationCache.make_key("a", "", "zh", "en", "你好"),
+        TranslationCache.make_key("b", "", "zh", "en", "你好"),
+        TranslationCache.make_key("a", "m", "zh", "en", "你好"),
+        TranslationCache.make_key("a", "", "zh", "ja", "你好"),
+    }
+    assert len(keys) == 4
+
+def test_engines_sharing_a_cache_do_not_collide(tmp_path):
+    config = {"cache_dir": str(tmp_path), "memory_cache_size": 16}
+    echo = EchoEngine(config)
+    other = OtherEngine(config)
+    
+    echo.set_cached("你好", "hello")
+    assert echo.get_cached("你好") == "hello"
+    assert other.get_cached("你好") is None
+    assert other.uncached_texts(["你好", "你好"]) == ["你好"]
+    assert echo.uncached_texts(["你好", "再见"]) == ["再见"]
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryCache(max_size=2)
+    cache.set(b"a", "A")
+    cache.set(b"b", "B")
+    assert cache.get(b"a") == "A"  # a成为最近使用的条目
+    
+    cache.set(b"c", "C")
+    assert cache.get(b"b") is None
+    assert cache.get(b"a") == "A"
+    assert cache.get(b"c") == "C"
@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+术语替换测试
+"""
+
+import pytest
+
+from src import utils
+from src.utils import GlossaryMatcher
+
+@pytest.fixture(params=["automaton", "regex"])
+def matcher_backend(request, monkeypatch):
+    """分别测试Aho-Corasick自动机和正则表达式两种实现"""
+    if request.param == "automaton":
+        if utils.ahocorasick is None:
+            pytest.skip("未安装pyahocorasick")
+    else:
+        monkeypatch.setattr(utils, "ahocorasick", None)
+    return request.param
+
+def test_longest_term_wins(matcher_backend):
+    matcher = GlossaryMatcher({"张三": "Zhang San", "张三丰": "Zhang Sanfeng"})
+    assert matcher.replace("张三丰见到张三") == "Zhang Sanfeng见到Zhang San"
+
+def test_overlapping_terms_take_leftmost_match(matcher_backend):
+    matcher = GlossaryMatcher({"武当": "Wudang", "当山": "Dangshan"})
+    assert matcher.replace("武当山") == "Wudang山"
+
+def test_nested_shorter_term_is_not_replaced_inside_longer(matcher_backend):
+    matcher = GlossaryMatcher({"三丰": "Sanfeng", "张三丰": "Zhang Sanfeng"})
+    assert matcher.replace("张三丰和三丰") == "Zhang Sanfeng和Sanfeng"
+
+def test_replacements_are_not_rescanned(matcher_backend):
+    matcher = GlossaryMatcher({"A": "B", "B": "C"})
+    assert matcher.replace("AB") == "BC"
+
+def test_empty_glossary_returns_text_unchanged(matcher_backend):
+    matcher = GlossaryMatcher({"": "x"})
+    assert matcher.replace("张三") == "张三"
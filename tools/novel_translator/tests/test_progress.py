@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+进度保存与日志重放测试
+"""
+
+from src.models import Document, PROGRESS_JOURNAL_SUFFIX
+
+def make_document() -> Document:
+    document = Document(id="doc", title="书名", source_language="zh", target_language="en")
+    chapter_id = document.add_chapter("第一章")
+    for text in ("第一段。", "第二段。", "第三段。"):
+        document.add_paragraph(text, chapter_id=chapter_id)
+    return document
+
+def test_journal_replay_stops_at_truncated_line(tmp_path):
+    path = str(tmp_path / "doc_progress.json")
+    document = make_document()
+    document.save_progress(path)
+    
+    document.mark_translated(0, "Paragraph one.")
+    document.append_progress(path, [document.paragraphs[0]])
+    document.mark_translated(1, "Paragraph two.")
+    document.append_progress(path, [document.paragraphs[1]])
+    
+    # 模拟写入最后一行时进程被中断，截断在多字节字符中间
+    document.mark_translated(2, "第三段译文")
+    document.append_progress(path, [document.paragraphs[2]])
+    journal_path = path + PROGRESS_JOURNAL_SUFFIX
+    with open(journal_path, "rb") as f:
+        data = f.read()
+    with open(journal_path, "wb") as f:
+        f.write(data[:-6])
+    
+    loaded = Document.load_progress(path)
+    assert loaded.paragraphs[0].translated == "Paragraph one."
+    assert loaded.paragraphs[1].translated == "Paragraph two."
+    assert not loaded.paragraphs[2].is_translated
+    assert loaded.translated_count == 2
+
+def test_save_progress_supersedes_journal(tmp_path):
+    path = str(tmp_path / "doc_progress.json")
+    document = make_document()
+    document.mark_translated(0, "Paragraph one.")
+    document.append_progress(path, [document.paragraphs[0]])
+    document.save_progress(path)
+    
+    assert not (tmp_path / ("doc_progress.json" + PROGRESS_JOURNAL_SUFFIX)).exists()
+    loaded = Document.load_progress(path)
+    assert loaded.paragraphs[0].translated == "Paragraph one."
+    assert loaded.translated_count == 1